@@ -7,23 +7,29 @@ from datetime import datetime, timedelta
 from pydantic import BaseModel
 from typing import Optional
 import os
-import secrets
 from dotenv import load_dotenv
 from ..schemas import Token, TokenData
+from .shared_secrets import shared_secret
 
 # Load environment variables from .env file at the root of the project
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), '.env'))
 
 # Config
-SECRET_KEY = os.environ.get("SECRET_KEY", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
+# GitHub logins allowed to use the /api/admin/ endpoints, comma separated
+ADMIN_USERS = {user.strip() for user in os.environ.get("ADMIN_USERS", "").split(",") if user.strip()}
+
 # OAuth2 setup
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 router = APIRouter()
 
+def jwt_secret_key() -> str:
+    # Shared by all worker processes, so a token issued by one is valid on the others
+    return shared_secret("jwt")
+
 # GitHub OAuth setup
 config = Config()
 config.environ = {
@@ -54,7 +60,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, jwt_secret_key(), algorithm=ALGORITHM)
     
     return encoded_jwt
 
@@ -66,7 +72,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, jwt_secret_key(), algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         
         if username is None:
@@ -78,6 +84,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     
     return token_data.username
 
+def user_from_authorization(authorization: str) -> Optional[str]:
+    # For middleware, which runs outside the dependency system: the login a valid,
+    # unexpired "Authorization: Bearer" token belongs to, else None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    
+    try:
+        return jwt.decode(token, jwt_secret_key(), algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+def admin_from_authorization(authorization: str) -> Optional[str]:
+    # The admin login an "Authorization: Bearer" header belongs to, else None
+    username = user_from_authorization(authorization)
+    return username if username in ADMIN_USERS else None
+
+async def get_admin_user(current_user: str = Depends(get_current_user)):
+    if current_user not in ADMIN_USERS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    
+    return current_user
+
 @router.get("/login")
 async def login(request: Request):
     redirect_uri = request.url_for('auth_callback')
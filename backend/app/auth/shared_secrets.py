@@ -0,0 +1,59 @@
+import os
+import secrets
+import tempfile
+from typing import Dict
+from ..database.init_db import database
+
+# Each secret's name and the environment variable that sets it explicitly
+SHARED_SECRETS = {
+    "jwt": "SECRET_KEY",
+    "session": "SESSION_SECRET_KEY",
+}
+
+# Generated secrets are kept next to the database file rather than in it, so a
+# backup of binventory.db can't be used to sign tokens or session cookies
+SECRETS_DIR = os.environ.get("SECRETS_DIR") or os.path.dirname(os.path.abspath(database.url.database))
+
+_loaded: Dict[str, str] = {}
+
+def secret_path(name: str) -> str:
+    return os.path.join(SECRETS_DIR, f"binventory-{name}.key")
+
+def shared_secret(name: str) -> str:
+    """The secret's environment variable, or else a random value generated once and kept in a file.
+
+    Every worker process reads the same file, so a token or session cookie
+    signed by one worker is accepted by the others and survives restarts.
+    Nothing is generated until the first call, which startup makes.
+    """
+    configured = os.environ.get(SHARED_SECRETS[name])
+    if configured:
+        return configured
+
+    if name not in _loaded:
+        _loaded[name] = read_or_create_secret(secret_path(name))
+    return _loaded[name]
+
+def load_shared_secrets() -> None:
+    for name in SHARED_SECRETS:
+        shared_secret(name)
+
+def read_or_create_secret(path: str) -> str:
+    if not os.path.exists(path):
+        # mkstemp creates the file readable by its owner only. Linking it into
+        # place fails if another worker got there first, so every worker ends up
+        # with the first value and none reads a half-written file.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".binventory-key-")
+        try:
+            with os.fdopen(fd, "w") as stream:
+                stream.write(secrets.token_urlsafe(32))
+            try:
+                os.link(temp_path, path)
+            except FileExistsError:
+                pass
+        finally:
+            os.remove(temp_path)
+
+    with open(path) as stream:
+        return stream.read().strip()
@@ -1 +1,4 @@
-from .init_db import database, metadata, engine
+from .init_db import database, read_database, metadata, engine
+from .pagination import encode_cursor, decode_cursor, decode_id_cursor, next_id_cursor
+from .cache import QueryCache, count_cache, response_cache, write_generation, item_cache_keys, invalidate_item_caches
+from .item_rows import ITEM_TAGS_JSON, ITEM_JSON, decode_item_row, decode_item_rows, decode_item_json
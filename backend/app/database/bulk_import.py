@@ -0,0 +1,166 @@
+import asyncio
+import csv
+import json
+import time
+from typing import IO, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from ..schemas import ItemCreate
+from .init_db import database, suspend_derived_triggers, resume_derived_triggers, rebuild_derived_tables
+from .queries import BULK_INSERT_ITEM_QUERY, INSERT_TAG_QUERY, item_insert_values
+from .cache import invalidate_item_caches
+from .name_index import name_index
+
+# Rows committed per transaction
+IMPORT_CHUNK_ROWS = 5000
+
+# Only the first rejected rows are reported back in detail
+MAX_REPORTED_ERRORS = 100
+
+class ImportFileError(Exception):
+    """The file can't be read as the given format at all, e.g. it isn't UTF-8."""
+
+def detect_format(filename: Optional[str]) -> str:
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+def normalize_row(row: dict) -> dict:
+    # Empty cells fall back to the ItemCreate defaults; ids from an export are ignored
+    values = {
+        key: value for key, value in row.items()
+        if key and key != "id" and value not in ("", None)
+    }
+
+    tags = values.get("tags")
+    if isinstance(tags, str):
+        # Accept the JSON array written by /api/export as well as a plain comma list
+        if tags.lstrip().startswith("["):
+            values["tags"] = json.loads(tags)
+        else:
+            values["tags"] = [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+    return values
+
+def decode_lines(stream: IO[bytes]) -> Iterator[str]:
+    # Decoded one line at a time, so a bad byte is reported on its own line and
+    # every row before it can still be imported
+    for line_number, line in enumerate(stream, start=1):
+        try:
+            yield line.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise ImportFileError(f"Line {line_number} is not valid UTF-8")
+
+def iter_rows(stream: IO[bytes], format: str) -> Iterator[Tuple[int, dict]]:
+    # Reads the file incrementally; yields (row number, raw row) pairs
+    lines = decode_lines(stream)
+
+    if format == "ndjson":
+        for line_number, line in enumerate(lines, start=1):
+            if line.strip():
+                yield line_number, line
+    else:
+        # Row numbers count the header line, matching what a spreadsheet shows
+        reader = csv.DictReader(lines)
+        try:
+            for line_number, row in enumerate(reader, start=2):
+                yield line_number, row
+        except csv.Error as exc:
+            raise ImportFileError(f"Malformed CSV at line {reader.reader.line_num}: {exc}")
+
+def parse_row(row) -> ItemCreate:
+    if isinstance(row, str):
+        row = json.loads(row)
+        if not isinstance(row, dict):
+            raise ValueError("Expected a JSON object")
+    return ItemCreate(**normalize_row(row))
+
+def read_chunk(rows: Iterator[Tuple[int, dict]], items: List[ItemCreate], rejected: list, chunk_size: int) -> bool:
+    # Parses rows into items, and failures into rejected, until chunk_size are
+    # valid; returns False once the file is exhausted
+    for row_number, row in rows:
+        try:
+            items.append(parse_row(row))
+        except (ValidationError, ValueError) as exc:
+            rejected.append((row_number, exc))
+
+        if len(items) >= chunk_size:
+            return True
+    return False
+
+def describe_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in exc.errors()
+        )
+    return str(exc)
+
+async def insert_chunk(connection, items) -> None:
+    raw = connection.raw_connection
+
+    async with connection.transaction():
+        await raw.executemany(BULK_INSERT_ITEM_QUERY, [item_insert_values(item) for item in items])
+
+        # We hold the write lock, so the new rowids are the contiguous block ending at MAX(id)
+        async with raw.execute("SELECT MAX(id) FROM items") as cursor:
+            last_id = (await cursor.fetchone())[0]
+        first_id = last_id - len(items) + 1
+
+        tag_values = [
+            {"item_id": first_id + offset, "tag": tag}
+            for offset, item in enumerate(items)
+            for tag in item.tags or []
+        ]
+        if tag_values:
+            await raw.executemany(INSERT_TAG_QUERY, tag_values)
+
+async def import_items(stream: IO[bytes], format: str = "csv", chunk_size: int = IMPORT_CHUNK_ROWS) -> dict:
+    started = time.perf_counter()
+    imported = 0
+    rejected = 0
+    errors = []
+    file_error = None
+    rows = iter_rows(stream, format)
+
+    async with database.connection() as connection:
+        await suspend_derived_triggers()
+        try:
+            more = True
+            while more:
+                # Decoding and validation run in a thread, so a large file doesn't
+                # hold up the event loop while the writer waits for the next chunk
+                chunk, rejected_rows = [], []
+                try:
+                    more = await asyncio.to_thread(read_chunk, rows, chunk, rejected_rows, chunk_size)
+                except ImportFileError as exc:
+                    # Nothing after this point can be read; the rows before it still go in
+                    file_error, more = exc, False
+
+                for row_number, exc in rejected_rows:
+                    rejected += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"row": row_number, "detail": describe_error(exc)})
+
+                if chunk:
+                    await insert_chunk(connection, chunk)
+                    imported += len(chunk)
+        finally:
+            # Restore the triggers even if the load failed part way through. The
+            # rebuild also bumps the write generation, once for the whole import.
+            async with connection.transaction():
+                await resume_derived_triggers()
+                await rebuild_derived_tables()
+            invalidate_item_caches()
+            name_index.invalidate()
+
+    if file_error is not None:
+        raise ImportFileError(f"{file_error}; the {imported} rows before it were imported")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "rejected": rejected,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(imported / elapsed, 1) if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from .init_db import read_database
+from .name_index import name_index
+from .generation import GENERATION_QUERY
+
+class QueryCache:
+    """Bounded LRU cache for query results and rendered responses.
+
+    Entries may name dependencies, such as ("area", "Garage"), so a write can
+    evict just the entries it affects. maxweight optionally bounds the summed
+    weigh(value) of the entries, e.g. total bytes of cached response bodies.
+    """
+
+    def __init__(self, maxsize: int = 256, maxweight: Optional[int] = None, weigh: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every clear or evict, so a reader can tell whether its result went stale
+        self.version = 0
+        self._data = OrderedDict()
+        self._dependencies: Dict[Hashable, tuple] = {}
+        self._keys_by_dependency: Dict[Hashable, Set[Hashable]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, dependencies: Iterable[Hashable] = ()) -> None:
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = value
+        if self.weigh:
+            self.weight += self.weigh(value)
+        self._dependencies[key] = tuple(dependencies)
+        for dependency in self._dependencies[key]:
+            self._keys_by_dependency.setdefault(dependency, set()).add(key)
+        
+        # Drop the least recently used entries once we go over either limit
+        while len(self._data) > self.maxsize or (self.maxweight is not None and self.weight > self.maxweight):
+            self._remove(next(iter(self._data)))
+
+    def evict(self, dependencies: Iterable[Hashable]) -> None:
+        self.version += 1
+        for dependency in dependencies:
+            for key in self._keys_by_dependency.pop(dependency, ()):
+                if key in self._data:
+                    self._remove(key)
+
+    def clear(self) -> None:
+        self.version += 1
+        self._data.clear()
+        self._dependencies.clear()
+        self._keys_by_dependency.clear()
+        self.weight = 0
+
+    def _remove(self, key: Hashable) -> None:
+        value = self._data.pop(key)
+        if self.weigh:
+            self.weight -= self.weigh(value)
+        for dependency in self._dependencies.pop(key, ()):
+            keys = self._keys_by_dependency.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_dependency[dependency]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "weight": self.weight,
+            "maxweight": self.maxweight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class WriteGeneration:
+    """In-memory copy of the trigger-maintained write_generation counter.
+
+    The counter is re-read on every check, since another worker process or
+    the offline import command may have written since this process last
+    looked; it is a primary key lookup. A value this process didn't produce
+    means someone else wrote, so the local caches are dropped.
+    ConditionalGetMiddleware checks before every API read.
+    """
+
+    def __init__(self):
+        self._value: Optional[int] = None
+        self.foreign_writes = 0
+
+    async def current(self) -> int:
+        value = await read_database.fetch_val(query=GENERATION_QUERY)
+        self._advance(value, value)
+        return self._value
+
+    def observe(self, before: int, after: int) -> None:
+        # Called by writers with the values read at the start and end of their
+        # own transaction; anything between the last known value and before
+        # was written elsewhere
+        if self._value != after:
+            self._advance(before, after)
+
+    def _advance(self, before: int, after: int) -> None:
+        if self._value is not None and before != self._value:
+            self.foreign_writes += 1
+            drop_local_caches()
+        self._value = after
+
+# Totals for GET /api/items keyed by the filter set
+count_cache = QueryCache(maxsize=256)
+
+# Rendered JSON bodies of the location and tag read routes, evicted by location and tag
+response_cache = QueryCache(maxsize=512, maxweight=32 * 1024 * 1024, weigh=len)
+
+write_generation = WriteGeneration()
+
+def item_cache_keys(values, tags: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    # Response cache dependencies touched by writing one item with these values and tags
+    keys = [(kind, values.get(kind)) for kind in ("area", "container", "bin") if values.get(kind)]
+    keys.extend(("tag", tag) for tag in tags)
+    # The name lists may gain or lose an entry whenever a name is touched
+    keys.extend(("names", kind) for kind in {kind for kind, _ in keys})
+    return keys
+
+def invalidate_item_caches(touched: Optional[Iterable[Tuple[str, str]]] = None) -> None:
+    # Called by every route that writes to items or items_tags. touched lists the
+    # item_cache_keys of the write; None means anything may have changed.
+    count_cache.clear()
+    if touched is None:
+        response_cache.clear()
+    else:
+        response_cache.evict(touched)
+
+def drop_local_caches() -> None:
+    # Everything this process caches about the inventory, for when it can't
+    # tell what changed
+    count_cache.clear()
+    response_cache.clear()
+    name_index.invalidate()
@@ -0,0 +1,196 @@
+import asyncio
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+import aiosqlite
+import databases
+from databases.backends.sqlite import SQLiteBackend, SQLiteConnection, SQLiteTransaction
+
+# Applied to every connection, async or sync. Override entries with
+# SQLITE_PRAGMAS="cache_size=-131072,mmap_size=0".
+DEFAULT_SQLITE_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "cache_size": "-65536",
+    "mmap_size": "268435456",
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+# Settings that belong to the database file rather than the connection; read-only
+# connections can't change them
+DATABASE_WIDE_PRAGMAS = ("journal_mode",)
+
+# PRAGMA values can't be bound, so only plain words and numbers are accepted
+PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+# Read-only connections kept open for the GET routes
+READ_POOL_SIZE = int(os.environ.get("SQLITE_READ_POOL_SIZE", "4"))
+
+# Called after every successful query on either database as
+# observer(database, method, query, values, seconds, rows), where database is
+# "write" or "read" and rows is how many rows the query returned. Observers run
+# on the request path, so they must be quick and must not query themselves.
+QUERY_OBSERVERS: List[Callable[[str, str, Any, Any, float, int], None]] = []
+
+def load_sqlite_profile() -> Dict[str, str]:
+    profile = dict(DEFAULT_SQLITE_PROFILE)
+    for pair in os.environ.get("SQLITE_PRAGMAS", "").split(","):
+        if "=" in pair:
+            name, value = (part.strip() for part in pair.split("=", 1))
+            if name in profile and PRAGMA_VALUE.match(value):
+                profile[name] = value
+    return profile
+
+SQLITE_PROFILE = load_sqlite_profile()
+
+def profile_statements(profile: Dict[str, str], read_only: bool = False) -> List[str]:
+    statements = [
+        f"PRAGMA {name} = {value}" for name, value in profile.items()
+        if not (read_only and name in DATABASE_WIDE_PRAGMAS)
+    ]
+    if read_only:
+        statements.append("PRAGMA query_only = ON")
+    return statements
+
+class SQLiteConnectionPool:
+    """A fixed number of persistent aiosqlite connections, each set up once.
+
+    Replaces the databases SQLite pool, which opens a new connection (and
+    thread) for every query. Callers wait for a free connection once all
+    `size` are in use, so a pool of one serializes its users.
+    """
+
+    def __init__(self, database: str, size: int, statements: List[str]):
+        self.database = database
+        self.size = size
+        self.statements = statements
+        self._opened = 0
+        self._idle: Optional[asyncio.Queue] = None
+
+    async def _open(self) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(database=self.database, isolation_level=None)
+        for statement in self.statements:
+            await connection.execute(statement)
+        return connection
+
+    async def acquire(self) -> aiosqlite.Connection:
+        # The queue is created on first use so it belongs to the running event loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+
+        if self._idle.empty() and self._opened < self.size:
+            self._opened += 1
+            try:
+                return await self._open()
+            except Exception:
+                self._opened -= 1
+                raise
+
+        return await self._idle.get()
+
+    async def release(self, connection: aiosqlite.Connection) -> None:
+        # Never hand the next user a connection with a transaction left open
+        if connection.in_transaction:
+            await connection.rollback()
+        self._idle.put_nowait(connection)
+
+    async def close(self) -> None:
+        if self._idle is not None:
+            while not self._idle.empty():
+                await self._idle.get_nowait().close()
+        self._idle = None
+        self._opened = 0
+
+class ImmediateTransaction(SQLiteTransaction):
+    # Takes the write lock at BEGIN, so a transaction that reads before it writes
+    # waits out other processes' writers (busy_timeout) instead of failing with
+    # SQLITE_BUSY when its snapshot turns out to be stale
+    async def start(self, is_root: bool, extra_options) -> None:
+        if not is_root:
+            await super().start(is_root, extra_options)
+            return
+        self._is_root = True
+        async with self._connection._connection.execute("BEGIN IMMEDIATE") as cursor:
+            await cursor.close()
+
+class WriterConnection(SQLiteConnection):
+    def transaction(self) -> ImmediateTransaction:
+        return ImmediateTransaction(self)
+
+class PooledSQLiteBackend(SQLiteBackend):
+    def __init__(self, database_url, pool_size: int = 1, read_only: bool = False):
+        super().__init__(database_url)
+        self.read_only = read_only
+        self._pool = SQLiteConnectionPool(
+            self._database_url.database,
+            pool_size,
+            profile_statements(SQLITE_PROFILE, read_only=read_only),
+        )
+
+    def connection(self) -> SQLiteConnection:
+        if self.read_only:
+            return super().connection()
+        return WriterConnection(self._pool, self._dialect)
+
+    async def disconnect(self) -> None:
+        await self._pool.close()
+
+class SQLiteDatabase(databases.Database):
+    """databases.Database over a SQLiteConnectionPool with the connection profile applied.
+
+    Use pool_size=1 for the writer, so writes queue in the application instead
+    of failing with "database is locked", and read_only=True for the readers.
+    Every query is timed and reported to QUERY_OBSERVERS.
+    """
+
+    def __init__(self, url: str, pool_size: int = 1, read_only: bool = False):
+        super().__init__(url)
+        self._backend = PooledSQLiteBackend(self.url, pool_size=pool_size, read_only=read_only)
+        self.role = "read" if read_only else "write"
+
+    def _observe(self, method: str, query, values, started: float, rows: int) -> None:
+        seconds = time.perf_counter() - started
+        for observer in QUERY_OBSERVERS:
+            observer(self.role, method, query, values, seconds, rows)
+
+    async def fetch_all(self, query, values: Optional[dict] = None):
+        started = time.perf_counter()
+        result = await super().fetch_all(query, values)
+        self._observe("fetch_all", query, values, started, len(result))
+        return result
+
+    async def fetch_one(self, query, values: Optional[dict] = None):
+        started = time.perf_counter()
+        result = await super().fetch_one(query, values)
+        self._observe("fetch_one", query, values, started, int(result is not None))
+        return result
+
+    async def fetch_val(self, query, values: Optional[dict] = None, column: Any = 0):
+        started = time.perf_counter()
+        result = await super().fetch_val(query, values, column)
+        self._observe("fetch_val", query, values, started, int(result is not None))
+        return result
+
+    async def execute(self, query, values: Optional[dict] = None):
+        started = time.perf_counter()
+        result = await super().execute(query, values)
+        self._observe("execute", query, values, started, 0)
+        return result
+
+    async def execute_many(self, query, values: list):
+        started = time.perf_counter()
+        await super().execute_many(query, values)
+        self._observe("execute_many", query, values, started, 0)
+
+    async def iterate(self, query, values: Optional[dict] = None):
+        # Timed from the first row to the last, including the time the consumer
+        # spends between rows
+        started = time.perf_counter()
+        rows = 0
+        async for row in super().iterate(query, values):
+            rows += 1
+            yield row
+        self._observe("iterate", query, values, started, rows)
@@ -0,0 +1,25 @@
+# A single counter bumped by triggers on every write to items or items_tags.
+# Responses derived from the inventory are tagged with it, so a client can ask
+# whether anything changed without the server recomputing the response.
+
+GENERATION_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS write_generation (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        value INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "INSERT OR IGNORE INTO write_generation (id, value) VALUES (1, 0)",
+]
+
+GENERATION_QUERY = "SELECT value FROM write_generation WHERE id = 1"
+
+GENERATION_TRIGGERS = {
+    f"{table}_generation_{suffix}": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_generation_{suffix} AFTER {event} ON {table} BEGIN
+            UPDATE write_generation SET value = value + 1 WHERE id = 1;
+        END;
+    """
+    for table in ("items", "items_tags")
+    for event, suffix in (("INSERT", "ai"), ("DELETE", "ad"), ("UPDATE", "au"))
+}
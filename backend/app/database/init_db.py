@@ -1,9 +1,20 @@
-import databases
+from contextlib import contextmanager
+import os
 import sqlalchemy
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from .connections import SQLiteDatabase, SQLITE_PROFILE, READ_POOL_SIZE, profile_statements
+from .migrations import run_migrations
+from .locations import LOCATION_TRIGGERS, REBUILD_LOCATIONS_QUERIES
+from .generation import GENERATION_TRIGGERS
 
-DATABASE_URL = "sqlite:///./binventory.db"
-database = databases.Database(DATABASE_URL)
+# The -wal and -shm files live next to this file, so deployments should persist its whole directory
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "./binventory.db")
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+
+# One dedicated writer connection; writes wait for it instead of hitting "database is locked"
+database = SQLiteDatabase(DATABASE_URL)
+# Read-only connections for the GET routes, which WAL lets run alongside the writer
+read_database = SQLiteDatabase(DATABASE_URL, pool_size=READ_POOL_SIZE, read_only=True)
 metadata = sqlalchemy.MetaData()
 
 # Create engine
@@ -11,9 +22,148 @@ engine = create_engine(
     DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+@event.listens_for(engine, "connect")
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    for statement in profile_statements(SQLITE_PROFILE):
+        dbapi_connection.execute(statement)
+
+# Triggers keeping items_fts and items_tags_fts in sync with their content tables
+FTS_TRIGGERS = {
+    # For items FTS
+    "items_ai": """
+        CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+            INSERT INTO items_fts(rowid, name, description, area, container, bin) 
+            VALUES (new.id, new.name, new.description, new.area, new.container, new.bin);
+        END;
+    """,
+    "items_ad": """
+        CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, name, description, area, container, bin) 
+            VALUES('delete', old.id, old.name, old.description, old.area, old.container, old.bin);
+        END;
+    """,
+    "items_au": """
+        CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, name, description, area, container, bin) 
+            VALUES('delete', old.id, old.name, old.description, old.area, old.container, old.bin);
+            INSERT INTO items_fts(rowid, name, description, area, container, bin) 
+            VALUES (new.id, new.name, new.description, new.area, new.container, new.bin);
+        END;
+    """,
+    # For items_tags FTS
+    "items_tags_ai": """
+        CREATE TRIGGER IF NOT EXISTS items_tags_ai AFTER INSERT ON items_tags BEGIN
+            INSERT INTO items_tags_fts(rowid, tag) VALUES (new.id, new.tag);
+        END;
+    """,
+    "items_tags_ad": """
+        CREATE TRIGGER IF NOT EXISTS items_tags_ad AFTER DELETE ON items_tags BEGIN
+            INSERT INTO items_tags_fts(items_tags_fts, rowid, tag) VALUES('delete', old.id, old.tag);
+        END;
+    """,
+    "items_tags_au": """
+        CREATE TRIGGER IF NOT EXISTS items_tags_au AFTER UPDATE ON items_tags BEGIN
+            INSERT INTO items_tags_fts(items_tags_fts, rowid, tag) VALUES('delete', old.id, old.tag);
+            INSERT INTO items_tags_fts(rowid, tag) VALUES (new.id, new.tag);
+        END;
+    """,
+    # For suggestions FTS (values are never updated in place, only upserted counts)
+    "suggestions_ai": """
+        CREATE TRIGGER IF NOT EXISTS suggestions_ai AFTER INSERT ON suggestions BEGIN
+            INSERT INTO suggestions_fts(rowid, value) VALUES (new.id, new.value);
+        END;
+    """,
+    "suggestions_ad": """
+        CREATE TRIGGER IF NOT EXISTS suggestions_ad AFTER DELETE ON suggestions BEGIN
+            INSERT INTO suggestions_fts(suggestions_fts, rowid, value) VALUES('delete', old.id, old.value);
+        END;
+    """,
+}
+
+# Autocomplete vocabulary: (suggestion kind, source table, source column)
+SUGGESTION_SOURCES = [
+    ("item", "items", "name"),
+    ("area", "items", "area"),
+    ("container", "items", "container"),
+    ("bin", "items", "bin"),
+    ("tag", "items_tags", "tag"),
+]
+
+def _suggestion_statements(table: str, event: str) -> str:
+    statements = []
+    for kind, source, column in SUGGESTION_SOURCES:
+        if source != table:
+            continue
+        
+        # On update only columns whose value actually changed are touched
+        changed = f" AND old.{column} IS NOT new.{column}" if event == "UPDATE" else ""
+        
+        if event in ("INSERT", "UPDATE"):
+            statements.append(f"""
+            INSERT INTO suggestions (kind, value, uses)
+            SELECT '{kind}', new.{column}, 1
+            WHERE new.{column} IS NOT NULL AND new.{column} <> ''{changed}
+            ON CONFLICT (kind, value) DO UPDATE SET uses = uses + 1;""")
+        
+        if event in ("DELETE", "UPDATE"):
+            statements.append(f"""
+            UPDATE suggestions SET uses = uses - 1
+            WHERE kind = '{kind}' AND value = old.{column}{changed};
+            DELETE FROM suggestions
+            WHERE kind = '{kind}' AND value = old.{column} AND uses <= 0;""")
+    
+    return "".join(statements)
+
+# Triggers keeping the suggestions vocabulary and its usage counts current
+SUGGESTION_TRIGGERS = {
+    f"{table}_suggest_{suffix}": f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_suggest_{suffix} AFTER {event} ON {table} BEGIN{_suggestion_statements(table, event)}
+        END;
+    """
+    for table in ("items", "items_tags")
+    for event, suffix in (("INSERT", "ai"), ("DELETE", "ad"), ("UPDATE", "au"))
+}
+
+REBUILD_SUGGESTIONS_QUERY = "INSERT INTO suggestions (kind, value, uses) " + " UNION ALL ".join(
+    f"SELECT '{kind}', {column}, COUNT(*) FROM {source} "
+    f"WHERE {column} IS NOT NULL AND {column} <> '' GROUP BY {column}"
+    for kind, source, column in SUGGESTION_SOURCES
+)
+
+# Every trigger that maintains derived data (search indexes, vocabulary, location
+# counters, the write generation)
+DERIVED_TRIGGERS = {**FTS_TRIGGERS, **SUGGESTION_TRIGGERS, **LOCATION_TRIGGERS, **GENERATION_TRIGGERS}
+
+# Recomputes every derived table from items and items_tags, and counts as one write
+REBUILD_DERIVED_QUERIES = [
+    "DELETE FROM suggestions",
+    REBUILD_SUGGESTIONS_QUERY,
+    *REBUILD_LOCATIONS_QUERIES,
+    "INSERT INTO items_fts(items_fts) VALUES('rebuild')",
+    "INSERT INTO items_tags_fts(items_tags_fts) VALUES('rebuild')",
+    "INSERT INTO suggestions_fts(suggestions_fts) VALUES('rebuild')",
+    "UPDATE write_generation SET value = value + 1 WHERE id = 1",
+]
+
+# How long a worker waits for another one to finish setting up the schema
+SCHEMA_LOCK_TIMEOUT_MS = 600000
+
+@contextmanager
+def schema_transaction():
+    # BEGIN IMMEDIATE takes the write lock up front, so workers starting together
+    # set up the schema one at a time and each sees what the one before it did
+    with engine.connect() as conn:
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {SCHEMA_LOCK_TIMEOUT_MS}")
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            yield conn
+            conn.commit()
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {SQLITE_PROFILE['busy_timeout']}")
+
 async def create_db_and_tables():
     # Create tables if they don't exist
-    with engine.begin() as conn:
+    with schema_transaction() as conn:
         conn.execute(text("""
         CREATE TABLE IF NOT EXISTS items (
             id INTEGER PRIMARY KEY,
@@ -59,47 +209,54 @@ async def create_db_and_tables():
         )
         """))
         
-        # Create triggers for FTS tables
-        # For items FTS
+        # Autocomplete vocabulary with a trigram index for substring lookups
         conn.execute(text("""
-        CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
-            INSERT INTO items_fts(rowid, name, description, area, container, bin) 
-            VALUES (new.id, new.name, new.description, new.area, new.container, new.bin);
-        END;
+        CREATE TABLE IF NOT EXISTS suggestions (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            uses INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (kind, value)
+        )
         """))
         
         conn.execute(text("""
-        CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
-            INSERT INTO items_fts(items_fts, rowid, name, description, area, container, bin) 
-            VALUES('delete', old.id, old.name, old.description, old.area, old.container, old.bin);
-        END;
+        CREATE VIRTUAL TABLE IF NOT EXISTS suggestions_fts USING fts5 (
+            value,
+            content='suggestions',
+            content_rowid='id',
+            tokenize='trigram'
+        )
         """))
         
-        conn.execute(text("""
-        CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
-            INSERT INTO items_fts(items_fts, rowid, name, description, area, container, bin) 
-            VALUES('delete', old.id, old.name, old.description, old.area, old.container, old.bin);
-            INSERT INTO items_fts(rowid, name, description, area, container, bin) 
-            VALUES (new.id, new.name, new.description, new.area, new.container, new.bin);
-        END;
-        """))
+        # Derived-data triggers this database doesn't have: it predates them, or a
+        # bulk import that had dropped them was killed before restoring them
+        existing_triggers = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+        missing_triggers = set(DERIVED_TRIGGERS) - existing_triggers
         
-        # For items_tags FTS
-        conn.execute(text("""
-        CREATE TRIGGER IF NOT EXISTS items_tags_ai AFTER INSERT ON items_tags BEGIN
-            INSERT INTO items_tags_fts(rowid, tag) VALUES (new.id, new.tag);
-        END;
-        """))
+        # Bring the schema up to date
+        run_migrations(conn)
         
-        conn.execute(text("""
-        CREATE TRIGGER IF NOT EXISTS items_tags_ad AFTER DELETE ON items_tags BEGIN
-            INSERT INTO items_tags_fts(items_tags_fts, rowid, tag) VALUES('delete', old.id, old.tag);
-        END;
-        """))
+        # Create triggers for FTS tables, the suggestions vocabulary and the location counters
+        for trigger_sql in DERIVED_TRIGGERS.values():
+            conn.execute(text(trigger_sql))
         
-        conn.execute(text("""
-        CREATE TRIGGER IF NOT EXISTS items_tags_au AFTER UPDATE ON items_tags BEGIN
-            INSERT INTO items_tags_fts(items_tags_fts, rowid, tag) VALUES('delete', old.id, old.tag);
-            INSERT INTO items_tags_fts(rowid, tag) VALUES (new.id, new.tag);
-        END;
-        """))
+        # Whatever those triggers would have maintained in the meantime is rebuilt from items
+        has_items = conn.execute(text("SELECT EXISTS (SELECT 1 FROM items)")).scalar()
+        if missing_triggers and has_items:
+            for query in REBUILD_DERIVED_QUERIES:
+                conn.execute(text(query))
+
+async def suspend_derived_triggers():
+    # Bulk loads drop the per-row triggers and rebuild the derived tables once at the end
+    for name in DERIVED_TRIGGERS:
+        await database.execute(query=f"DROP TRIGGER IF EXISTS {name}")
+
+async def resume_derived_triggers():
+    for trigger_sql in DERIVED_TRIGGERS.values():
+        await database.execute(query=trigger_sql)
+
+async def rebuild_derived_tables():
+    # Re-reads the content tables, so rows written while triggers were off are included too
+    for query in REBUILD_DERIVED_QUERIES:
+        await database.execute(query=query)
@@ -0,0 +1,43 @@
+import json
+from typing import Iterable, List
+
+# Columns of an item in the API, in table order; decoded items also carry tags and snippet
+ITEM_COLUMNS = ("id", "name", "description", "area", "container", "bin", "quantity", "cost", "url")
+
+# Tags of the item aliased as i, as a JSON array of [id, tag] pairs. Pairs decode
+# to plain lists, so each tag only becomes a dict once, in decode_tags.
+ITEM_TAGS_JSON = """(
+    SELECT json_group_array(json_array(it.id, it.tag))
+    FROM items_tags it WHERE it.item_id = i.id
+)"""
+
+# The whole item aliased as i, tags included, as one JSON object
+ITEM_JSON = f"""json_object(
+    'id', i.id, 'name', i.name, 'description', i.description,
+    'area', i.area, 'container', i.container, 'bin', i.bin,
+    'quantity', i.quantity, 'cost', i.cost, 'url', i.url,
+    'tags', json({ITEM_TAGS_JSON})
+)"""
+
+def decode_tags(item_id: int, tags) -> List[dict]:
+    # Accepts the ITEM_TAGS_JSON text or the already decoded pairs
+    if isinstance(tags, str):
+        tags = json.loads(tags)
+    return [{"id": tag_id, "item_id": item_id, "tag": tag} for tag_id, tag in tags or ()]
+
+def decode_item_row(row) -> dict:
+    # Row from a query selecting i.* and ITEM_TAGS_JSON AS tags; extra columns are dropped
+    item = {column: row[column] for column in ITEM_COLUMNS}
+    item["tags"] = decode_tags(item["id"], row["tags"])
+    item["snippet"] = None
+    return item
+
+def decode_item_rows(rows: Iterable) -> List[dict]:
+    return [decode_item_row(row) for row in rows]
+
+def decode_item_json(document: str) -> dict:
+    # Value of an ITEM_JSON column
+    item = json.loads(document)
+    item["tags"] = decode_tags(item["id"], item["tags"])
+    item["snippet"] = None
+    return item
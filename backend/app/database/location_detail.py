@@ -0,0 +1,151 @@
+from typing import Optional
+from .init_db import read_database
+from .item_rows import ITEM_JSON, decode_item_json
+
+# Each level describes how to resolve the location, where its rolled-up counters
+# live, which child locations to list and which items belong to it. The query
+# built from it returns the summary, the children and the items in one round trip.
+LOCATION_DETAIL_LEVELS = {
+    "area": {
+        "scope": """
+            SELECT name AS area, '' AS container FROM areas WHERE name = :name
+        """,
+        "summary": "areas t, scope WHERE t.name = :name",
+        "children": """
+            SELECT name, item_count, total_quantity, total_value
+            FROM containers
+            WHERE area = :name
+            ORDER BY name
+            LIMIT 6
+        """,
+        "items": "i.area = :name",
+    },
+    "container": {
+        # Without an explicit area the first area holding the container is used;
+        # '' means the container has no area, in which case every area is included
+        "scope": """
+            SELECT area, '' AS container FROM containers
+            WHERE name = :name AND (:area IS NULL OR area = :area)
+            ORDER BY area
+            LIMIT 1
+        """,
+        "summary": "containers t, scope WHERE t.name = :name AND (scope.area = '' OR t.area = scope.area)",
+        "children": """
+            SELECT DISTINCT b.name, NULL, NULL, NULL
+            FROM bins b, scope
+            WHERE b.container = :name AND (scope.area = '' OR b.area = scope.area)
+            ORDER BY b.name
+            LIMIT 6
+        """,
+        "items": "i.container = :name AND (scope.area = '' OR i.area = scope.area)",
+    },
+    "bin": {
+        "scope": """
+            SELECT area, container FROM bins
+            WHERE name = :name
+            AND (:area IS NULL OR area = :area)
+            AND (:container IS NULL OR container = :container)
+            ORDER BY area, container
+            LIMIT 1
+        """,
+        "summary": """bins t, scope WHERE t.name = :name
+            AND (scope.area = '' OR t.area = scope.area)
+            AND (scope.container = '' OR t.container = scope.container)""",
+        "children": None,
+        "items": """i.bin = :name
+            AND (scope.area = '' OR i.area = scope.area)
+            AND (scope.container = '' OR i.container = scope.container)""",
+    },
+}
+
+def build_location_detail_query(level: str, include_items: bool = True) -> str:
+    config = LOCATION_DETAIL_LEVELS[level]
+
+    # Section 0 is the summary row, 1 the child locations and 2 the items
+    sections = [f"""
+        SELECT 0 AS section, NULL AS position, scope.area AS name,
+            SUM(t.item_count) AS item_count, SUM(t.total_quantity) AS total_quantity,
+            SUM(t.total_value) AS total_value, scope.container AS parent, NULL AS item
+        FROM {config["summary"]}
+        GROUP BY scope.area, scope.container
+    """]
+
+    if config["children"]:
+        sections.append(f"""
+            SELECT 1, NULL, *, NULL, NULL FROM ({config["children"]})
+        """)
+
+    # Items are paged by id; a negative :items_limit means no limit
+    if include_items:
+        sections.append(f"""
+            SELECT * FROM (
+                SELECT 2, i.id, NULL, NULL, NULL, NULL, NULL, {ITEM_JSON}
+                FROM items i, scope
+                WHERE {config["items"]} AND i.id > :after_id
+                ORDER BY i.id
+                LIMIT :items_limit
+            )
+        """)
+
+    return f"""
+        WITH scope AS ({config["scope"]})
+        SELECT * FROM (
+            {" UNION ALL ".join(sections)}
+        )
+        ORDER BY section, position, name
+    """
+
+LOCATION_DETAIL_QUERIES = {level: build_location_detail_query(level) for level in LOCATION_DETAIL_LEVELS}
+LOCATION_SUMMARY_QUERIES = {level: build_location_detail_query(level, include_items=False) for level in LOCATION_DETAIL_LEVELS}
+
+async def fetch_location_detail(
+    level: str,
+    name: str,
+    area: Optional[str] = None,
+    container: Optional[str] = None,
+    include_items: bool = True,
+    items_limit: Optional[int] = None,
+    after_id: int = 0,
+) -> Optional[dict]:
+    # Returns None when the location does not exist
+    values = {"name": name}
+    if level in ("container", "bin"):
+        values["area"] = area
+    if level == "bin":
+        values["container"] = container
+
+    if include_items:
+        query = LOCATION_DETAIL_QUERIES[level]
+        values["after_id"] = after_id
+        values["items_limit"] = -1 if items_limit is None else items_limit
+    else:
+        query = LOCATION_SUMMARY_QUERIES[level]
+
+    rows = await read_database.fetch_all(query=query, values=values)
+
+    if not rows or rows[0]["section"] != 0:
+        return None
+
+    summary = rows[0]
+    detail = {
+        "area": summary["name"] or "Unknown",
+        "container": summary["parent"] or "Unknown",
+        "item_count": summary["item_count"] or 0,
+        "total_quantity": summary["total_quantity"] or 0,
+        "total_value": summary["total_value"] or 0.0,
+        "children": [],
+        "items": [],
+    }
+
+    for row in rows[1:]:
+        if row["section"] == 1:
+            detail["children"].append({
+                "name": row["name"],
+                "item_count": row["item_count"],
+                "total_quantity": row["total_quantity"],
+                "total_value": row["total_value"],
+            })
+        else:
+            detail["items"].append(decode_item_json(row["item"]))
+
+    return detail
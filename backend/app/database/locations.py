@@ -0,0 +1,124 @@
+# Areas, containers and bins as first-class tables with rolled-up counters.
+# Triggers on items keep item_count, total_quantity and total_value current, so
+# location listings and summaries are key lookups instead of scans over items.
+# Missing parent locations are stored as '' so they can take part in UNIQUE keys.
+
+LOCATION_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS areas (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        total_quantity INTEGER NOT NULL DEFAULT 0,
+        total_value REAL NOT NULL DEFAULT 0.0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS containers (
+        id INTEGER PRIMARY KEY,
+        area TEXT NOT NULL DEFAULT '',
+        name TEXT NOT NULL,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        total_quantity INTEGER NOT NULL DEFAULT 0,
+        total_value REAL NOT NULL DEFAULT 0.0,
+        UNIQUE (area, name)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_containers_name ON containers (name)",
+    """
+    CREATE TABLE IF NOT EXISTS bins (
+        id INTEGER PRIMARY KEY,
+        area TEXT NOT NULL DEFAULT '',
+        container TEXT NOT NULL DEFAULT '',
+        name TEXT NOT NULL,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        total_quantity INTEGER NOT NULL DEFAULT 0,
+        total_value REAL NOT NULL DEFAULT 0.0,
+        UNIQUE (area, container, name)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_bins_name ON bins (name)",
+    "CREATE INDEX IF NOT EXISTS idx_bins_container ON bins (container, name)",
+]
+
+# (table, key columns, item expressions for those keys); the last key is the location's own name
+LOCATION_LEVELS = [
+    ("areas", ["name"], ["{row}.area"]),
+    ("containers", ["area", "name"], ["COALESCE({row}.area, '')", "{row}.container"]),
+    ("bins", ["area", "container", "name"], ["COALESCE({row}.area, '')", "COALESCE({row}.container, '')", "{row}.bin"]),
+]
+
+def _add_statement(table: str, columns: list, expressions: list) -> str:
+    values = ", ".join(expression.format(row="new") for expression in expressions)
+    own_name = expressions[-1].format(row="new")
+    return f"""
+            INSERT INTO {table} ({", ".join(columns)}, item_count, total_quantity, total_value)
+            SELECT {values}, 1, COALESCE(new.quantity, 0), COALESCE(new.quantity, 0) * COALESCE(new.cost, 0)
+            WHERE {own_name} IS NOT NULL
+            ON CONFLICT ({", ".join(columns)}) DO UPDATE SET
+                item_count = item_count + 1,
+                total_quantity = total_quantity + excluded.total_quantity,
+                total_value = total_value + excluded.total_value;"""
+
+def _remove_statements(table: str, columns: list, expressions: list) -> str:
+    match = " AND ".join(
+        f"{column} = {expression.format(row='old')}" for column, expression in zip(columns, expressions)
+    )
+    return f"""
+            UPDATE {table} SET
+                item_count = item_count - 1,
+                total_quantity = total_quantity - COALESCE(old.quantity, 0),
+                total_value = total_value - COALESCE(old.quantity, 0) * COALESCE(old.cost, 0)
+            WHERE {match};
+            DELETE FROM {table} WHERE {match} AND item_count <= 0;"""
+
+def _trigger_body(event: str) -> str:
+    statements = []
+    for table, columns, expressions in LOCATION_LEVELS:
+        # On update the new location is counted before the old one is released,
+        # so a location that keeps the item never drops to zero in between
+        if event in ("INSERT", "UPDATE"):
+            statements.append(_add_statement(table, columns, expressions))
+        if event in ("DELETE", "UPDATE"):
+            statements.append(_remove_statements(table, columns, expressions))
+    return "".join(statements)
+
+LOCATION_TRIGGERS = {
+    "items_location_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS items_location_ai AFTER INSERT ON items BEGIN{_trigger_body("INSERT")}
+        END;
+    """,
+    "items_location_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS items_location_ad AFTER DELETE ON items BEGIN{_trigger_body("DELETE")}
+        END;
+    """,
+    "items_location_au": f"""
+        CREATE TRIGGER IF NOT EXISTS items_location_au AFTER UPDATE OF area, container, bin, quantity, cost ON items BEGIN{_trigger_body("UPDATE")}
+        END;
+    """,
+}
+
+# Recomputes every counter from items
+REBUILD_LOCATIONS_QUERIES = [
+    "DELETE FROM areas",
+    "DELETE FROM containers",
+    "DELETE FROM bins",
+    """
+    INSERT INTO areas (name, item_count, total_quantity, total_value)
+    SELECT area, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * cost), 0)
+    FROM items WHERE area IS NOT NULL
+    GROUP BY area
+    """,
+    """
+    INSERT INTO containers (area, name, item_count, total_quantity, total_value)
+    SELECT COALESCE(area, ''), container, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * cost), 0)
+    FROM items WHERE container IS NOT NULL
+    GROUP BY COALESCE(area, ''), container
+    """,
+    """
+    INSERT INTO bins (area, container, name, item_count, total_quantity, total_value)
+    SELECT COALESCE(area, ''), COALESCE(container, ''), bin, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * cost), 0)
+    FROM items WHERE bin IS NOT NULL
+    GROUP BY COALESCE(area, ''), COALESCE(container, ''), bin
+    """,
+]
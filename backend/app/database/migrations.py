@@ -0,0 +1,50 @@
+from sqlalchemy import text
+from .locations import LOCATION_TABLES, LOCATION_TRIGGERS, REBUILD_LOCATIONS_QUERIES
+from .generation import GENERATION_TABLES, GENERATION_TRIGGERS
+
+# Ordered schema migrations tracked by PRAGMA user_version. Append new entries
+# with the next version number; never edit one that has already shipped.
+MIGRATIONS = [
+    (1, "Add lookup indexes for location and tag filters", [
+        "CREATE INDEX IF NOT EXISTS idx_items_location ON items (area, container, bin)",
+        "CREATE INDEX IF NOT EXISTS idx_items_container_bin ON items (container, bin)",
+        "CREATE INDEX IF NOT EXISTS idx_items_bin ON items (bin)",
+        "CREATE INDEX IF NOT EXISTS idx_items_tags_tag ON items_tags (tag, item_id)",
+        "CREATE INDEX IF NOT EXISTS idx_items_tags_item ON items_tags (item_id)",
+        "ANALYZE",
+    ]),
+    (2, "Add areas, containers and bins tables with trigger-maintained counters", [
+        *LOCATION_TABLES,
+        *LOCATION_TRIGGERS.values(),
+        *REBUILD_LOCATIONS_QUERIES,
+    ]),
+    (3, "Add the write generation counter used for ETags", [
+        *GENERATION_TABLES,
+        *GENERATION_TRIGGERS.values(),
+    ]),
+    (4, "Remove tags left behind by item deletes before foreign keys were enforced", [
+        "DELETE FROM items_tags WHERE item_id NOT IN (SELECT id FROM items)",
+    ]),
+]
+
+def get_schema_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+def run_migrations(conn) -> list:
+    # Applies every migration newer than the database, in order, on the given
+    # connection (inside the caller's transaction). Returns the versions applied.
+    current = get_schema_version(conn)
+    applied = []
+    
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        
+        for statement in statements:
+            conn.execute(text(statement))
+        
+        # PRAGMA arguments can't be bound; version is always one of our own ints
+        conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+        applied.append(version)
+    
+    return applied
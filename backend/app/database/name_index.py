@@ -0,0 +1,169 @@
+import asyncio
+import sys
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+from .init_db import read_database
+
+# Low-cardinality names served from memory instead of SQLite
+NAME_KINDS = ("area", "container", "bin", "tag")
+
+class NameIndex:
+    """Sorted, case-insensitive prefix index of location and tag names with usage counts.
+
+    Loaded from the suggestions table on first use and then adjusted in place
+    by the item write routes, so lookups never touch the database. The loaded
+    snapshot is tagged with the write generation it reflects, and every
+    adjustment with the generation its write committed at, so a write is
+    counted exactly once whichever way its commit and the load interleave.
+    """
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {kind: {} for kind in NAME_KINDS}
+        self._sorted: Dict[str, List[Tuple[str, str]]] = {kind: [] for kind in NAME_KINDS}
+        self._loaded = False
+        self._loading = False
+        # Write generation the loaded counts include
+        self._generation = 0
+        # Changes applied while a load was reading, replayed once it is done
+        self._pending: List[Tuple[int, List[Tuple[str, Optional[str], int]]]] = []
+        # Bumped by invalidate(), so a load that straddles one starts over
+        self._epoch = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+
+        async with self._lock:
+            while not self._loaded:
+                epoch = self._epoch
+                self._loading = True
+                try:
+                    # One statement, so the generation and the names come from the same snapshot
+                    rows = await read_database.fetch_all(query="""
+                        SELECT g.value AS generation, s.kind, s.value, s.uses
+                        FROM write_generation g
+                        LEFT JOIN suggestions s ON s.kind IN ('area', 'container', 'bin', 'tag')
+                        WHERE g.id = 1
+                    """)
+                finally:
+                    self._loading = False
+
+                # Invalidated while we were reading; the snapshot may predate a bulk load
+                if epoch != self._epoch:
+                    continue
+
+                counts = {kind: {} for kind in NAME_KINDS}
+                for row in rows:
+                    if row["kind"] is not None:
+                        counts[row["kind"]][row["value"]] = row["uses"]
+
+                self._counts = counts
+                self._sorted = {
+                    kind: sorted((value.casefold(), value) for value in values)
+                    for kind, values in counts.items()
+                }
+                self._generation = rows[0]["generation"]
+                self._loaded = True
+
+                pending, self._pending = self._pending, []
+                for generation, changes in pending:
+                    self.apply(changes, generation)
+
+    def invalidate(self) -> None:
+        # Used after bulk loads; the next lookup reloads from the database
+        self._loaded = False
+        self._epoch += 1
+        self._pending = []
+        self._counts = {kind: {} for kind in NAME_KINDS}
+        self._sorted = {kind: [] for kind in NAME_KINDS}
+
+    def adjust(self, kind: str, value: Optional[str], delta: int) -> None:
+        if not value or not self._loaded:
+            return
+
+        counts = self._counts[kind]
+        entry = (value.casefold(), value)
+        uses = counts.get(value, 0) + delta
+
+        if uses > 0:
+            if value not in counts:
+                insort(self._sorted[kind], entry)
+            counts[value] = uses
+        elif value in counts:
+            del counts[value]
+            names = self._sorted[kind]
+            position = bisect_left(names, entry)
+            if position < len(names) and names[position] == entry:
+                del names[position]
+
+    def apply(self, changes: Iterable[Tuple[str, Optional[str], int]], generation: int) -> None:
+        # generation is the write generation the changes' transaction committed at
+        if not self._loaded:
+            # Before any load there is nothing to adjust: the next one reads the
+            # committed write. During one it may or may not, so hold on to it.
+            if self._loading:
+                self._pending.append((generation, list(changes)))
+            return
+
+        # Already counted in the loaded snapshot
+        if generation <= self._generation:
+            return
+
+        for kind, value, delta in changes:
+            self.adjust(kind, value, delta)
+
+    def names(self, kind: str) -> List[str]:
+        # Same ordering as ORDER BY on the column
+        return sorted(self._counts[kind])
+
+    def lookup(self, kind: str, query: str, limit: int = 10) -> List[str]:
+        # Prefix matches come straight from a bisect over the sorted names;
+        # substring matches only fill the remaining slots
+        key = query.casefold()
+        counts = self._counts[kind]
+        names = self._sorted[kind]
+
+        matches = []
+        position = bisect_left(names, (key, ""))
+        while position < len(names) and names[position][0].startswith(key):
+            matches.append(names[position][1])
+            position += 1
+        matches.sort(key=lambda value: (-counts[value], value))
+
+        if len(matches) < limit:
+            seen = set(matches)
+            extra = [value for folded, value in names if key in folded and value not in seen]
+            extra.sort(key=lambda value: (-counts[value], value))
+            matches.extend(extra)
+
+        return matches[:limit]
+
+    def memory_bytes(self) -> int:
+        total = sys.getsizeof(self._counts) + sys.getsizeof(self._sorted)
+        for kind in NAME_KINDS:
+            total += sys.getsizeof(self._counts[kind]) + sys.getsizeof(self._sorted[kind])
+            for folded, value in self._sorted[kind]:
+                total += sys.getsizeof((folded, value)) + sys.getsizeof(value)
+                if folded is not value:
+                    total += sys.getsizeof(folded)
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "names": {kind: len(self._counts[kind]) for kind in NAME_KINDS},
+            "memory_bytes": self.memory_bytes(),
+        }
+
+name_index = NameIndex()
+
+def item_name_changes(values, tags: Iterable[str] = (), delta: int = 1) -> List[Tuple[str, Optional[str], int]]:
+    # Index adjustments for adding (delta=1) or removing (delta=-1) one item
+    changes = [(kind, values.get(kind), delta) for kind in ("area", "container", "bin") if values.get(kind)]
+    changes.extend(("tag", tag, delta) for tag in tags)
+    return changes
@@ -0,0 +1,36 @@
+import base64
+import json
+from typing import Optional
+
+def encode_cursor(data: dict) -> str:
+    # Opaque, URL-safe token holding the sort key of the last row on a page
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    # Raises ValueError for anything that did not come from encode_cursor
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+
+    return data
+
+def decode_id_cursor(cursor: Optional[str]) -> int:
+    # For item lists in id order; no cursor starts from the beginning
+    if not cursor:
+        return 0
+    try:
+        return int(decode_cursor(cursor)["id"])
+    except (KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+def next_id_cursor(items: list, limit: Optional[int]) -> Optional[str]:
+    # A full page means there may be more rows after the last one
+    if limit and items and len(items) == limit:
+        return encode_cursor({"id": items[-1]["id"]})
+    return None
@@ -0,0 +1,44 @@
+from ..schemas import ItemCreate, ItemUpdate
+
+INSERT_ITEM_QUERY = """
+    INSERT INTO items (name, description, area, container, bin, quantity, cost, url)
+    VALUES (:name, :description, :area, :container, :bin, :quantity, :cost, :url)
+    RETURNING id
+"""
+
+# Same insert without RETURNING, for executemany() on the raw connection
+BULK_INSERT_ITEM_QUERY = """
+    INSERT INTO items (name, description, area, container, bin, quantity, cost, url)
+    VALUES (:name, :description, :area, :container, :bin, :quantity, :cost, :url)
+"""
+
+INSERT_TAG_QUERY = """
+    INSERT INTO items_tags (item_id, tag)
+    VALUES (:item_id, :tag)
+"""
+
+UPDATABLE_FIELDS = ("name", "description", "area", "container", "bin", "quantity", "cost", "url")
+
+def item_insert_values(item: ItemCreate) -> dict:
+    return {field: getattr(item, field) for field in UPDATABLE_FIELDS}
+
+def build_item_update(item_id: int, item: ItemUpdate):
+    # Only fields that were provided (not None) are written
+    update_fields = []
+    values = {"item_id": item_id}
+    
+    for field in UPDATABLE_FIELDS:
+        value = getattr(item, field)
+        if value is not None:
+            update_fields.append(f"{field} = :{field}")
+            values[field] = value
+    
+    if not update_fields:
+        return None, values
+    
+    update_query = f"""
+        UPDATE items
+        SET {", ".join(update_fields)}
+        WHERE id = :item_id
+    """
+    return update_query, values
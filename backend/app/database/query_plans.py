@@ -0,0 +1,63 @@
+from sqlalchemy import text
+from .item_rows import ITEM_TAGS_JSON
+from .location_detail import LOCATION_DETAIL_QUERIES
+
+# Representative queries issued by the routes, used to check that they hit the indexes
+REPRESENTATIVE_QUERIES = {
+    "items by area": ("SELECT * FROM items WHERE area = :area", {"area": "Garage"}),
+    "items by container": ("SELECT * FROM items WHERE container = :container", {"container": "Shelf"}),
+    "items by bin": ("SELECT * FROM items WHERE bin = :bin", {"bin": "A1"}),
+    "containers in area": (
+        "SELECT container, COUNT(id), SUM(quantity) FROM items "
+        "WHERE area = :area AND container IS NOT NULL GROUP BY container",
+        {"area": "Garage"},
+    ),
+    "bins in container": (
+        "SELECT DISTINCT bin FROM items WHERE container = :container AND bin IS NOT NULL",
+        {"container": "Shelf"},
+    ),
+    "items with tag": (
+        "SELECT i.* FROM items i WHERE i.id IN (SELECT item_id FROM items_tags WHERE tag = :tag)",
+        {"tag": "m3"},
+    ),
+    "tags of item": (
+        f"SELECT i.*, {ITEM_TAGS_JSON} FROM items i WHERE i.id = :item_id",
+        {"item_id": 1},
+    ),
+    "area detail": (LOCATION_DETAIL_QUERIES["area"], {"name": "Garage", "after_id": 0, "items_limit": 100}),
+    "container detail": (
+        LOCATION_DETAIL_QUERIES["container"],
+        {"name": "Shelf", "area": None, "after_id": 0, "items_limit": 100},
+    ),
+    "bin detail": (
+        LOCATION_DETAIL_QUERIES["bin"],
+        {"name": "A1", "area": None, "container": None, "after_id": 0, "items_limit": 100},
+    ),
+}
+
+def explain_query_plan(conn, query: str, values: dict = None) -> list:
+    # Returns the EXPLAIN QUERY PLAN detail lines, indented by depth
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), values or {}).fetchall()
+    
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+def full_scans(plan: list) -> list:
+    # A "SCAN <table>" without an index is a full table scan; FTS virtual tables,
+    # VALUES lists and scans over materialized CTEs or subqueries (already planned
+    # on their own) are fine
+    derived = {
+        line.strip().split(" ", 1)[1]
+        for line in plan
+        if line.strip().startswith(("MATERIALIZE ", "CO-ROUTINE "))
+    }
+    return [
+        line.strip() for line in plan
+        if line.strip().startswith("SCAN ") and "USING" not in line and "VIRTUAL TABLE" not in line
+        and "CONSTANT ROW" not in line
+        and line.strip()[len("SCAN "):] not in derived
+    ]
@@ -0,0 +1,24 @@
+from contextvars import ContextVar
+from typing import Optional
+from .connections import QUERY_OBSERVERS
+
+class QueryStats:
+    """SQL statements run on behalf of one request, and the time they took."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# Set by ServerTimingMiddleware for the duration of a request. The write queue
+# carries it over to the task that runs the request's writes.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def record_query_stats(role: str, method: str, query, values, seconds: float, rows: int) -> None:
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+
+QUERY_OBSERVERS.append(record_query_stats)
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+from .connections import QUERY_OBSERVERS
+from .init_db import engine
+from .query_plans import explain_query_plan, full_scans
+
+# Statements at least this slow are recorded; SLOW_QUERY_MS=0 records everything
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_MS", "100")) / 1000
+
+# Distinct fingerprints kept; the one with the least total time goes first
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.environ.get("SLOW_QUERY_MAX_FINGERPRINTS", "200"))
+
+# Distinct parameter shapes kept per fingerprint
+MAX_SHAPES = 10
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w:])-?\d+(?:\.\d+)?\b")
+# Parameters generated per value, e.g. :tag0, :tag1
+NUMBERED_PARAMETER = re.compile(r"(:[A-Za-z_]+?)\d+\b")
+IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+REPEATED_TUPLES = re.compile(r"(\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(query: str) -> str:
+    # Literals become ?, generated lists collapse, so the variants the routes
+    # build with f-strings share one fingerprint per shape of query
+    normalized = STRING_LITERAL.sub("?", query)
+    normalized = NUMBER_LITERAL.sub("?", normalized)
+    normalized = NUMBERED_PARAMETER.sub(r"\1#", normalized)
+    normalized = IN_LIST.sub("IN (...)", normalized)
+    normalized = REPEATED_TUPLES.sub(r"\1, ...", normalized)
+    return WHITESPACE.sub(" ", normalized).strip()
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+def parameter_shape(values) -> str:
+    # Names and types of the bound values, never the values themselves
+    if isinstance(values, list):
+        return f"{len(values)} x ({parameter_shape(values[0])})" if values else "0 x ()"
+    if not values:
+        return ""
+    types = {NUMBERED_PARAMETER.sub(r"\1#", ":" + name)[1:]: type(value).__name__ for name, value in values.items()}
+    return ", ".join(f"{name}: {kind}" for name, kind in sorted(types.items()))
+
+class SlowQueryLog:
+    """Statements slower than a threshold, aggregated by normalized SQL.
+
+    The query plan of each fingerprint is captured once, in the background,
+    with the bound values of the first slow call; the values are not kept.
+    """
+
+    def __init__(self, threshold: float = SLOW_QUERY_SECONDS, max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS):
+        self.threshold = threshold
+        self.max_fingerprints = max_fingerprints
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        # Keeps the plan captures referenced until they finish
+        self._captures = set()
+
+    def observe(self, role: str, method: str, query, values, seconds: float, rows: int) -> None:
+        if seconds < self.threshold or not isinstance(query, str) or query.lstrip()[:7].upper() == "EXPLAIN":
+            return
+
+        normalized = normalize_sql(query)
+        key = fingerprint(normalized)
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.max_fingerprints:
+                del self.entries[min(self.entries, key=lambda k: self.entries[k]["total_seconds"])]
+            entry = self.entries[key] = {
+                "fingerprint": key,
+                "sql": normalized,
+                "database": role,
+                "method": method,
+                "parameter_shapes": [],
+                "count": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "rows": 0,
+                "first_seen": time.time(),
+                "last_seen": None,
+                "plan": None,
+                "full_scans": None,
+            }
+            self._capture_plan(entry, query, values[0] if isinstance(values, list) and values else values)
+
+        entry["count"] += 1
+        entry["total_seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        entry["rows"] += rows
+        entry["last_seen"] = time.time()
+        shape = parameter_shape(values)
+        if shape not in entry["parameter_shapes"] and len(entry["parameter_shapes"]) < MAX_SHAPES:
+            entry["parameter_shapes"].append(shape)
+
+    def _capture_plan(self, entry: Dict[str, Any], query: str, values: Optional[dict]) -> None:
+        def explain() -> List[str]:
+            with engine.connect() as conn:
+                return explain_query_plan(conn, query, values)
+
+        async def capture() -> None:
+            try:
+                plan = await asyncio.to_thread(explain)
+            except Exception as exc:
+                entry["plan"] = [f"EXPLAIN failed: {exc}"]
+                return
+            entry["plan"] = plan
+            entry["full_scans"] = full_scans(plan)
+
+        try:
+            task = asyncio.get_running_loop().create_task(capture())
+        except RuntimeError:  # no event loop, e.g. a script using the sync engine
+            return
+        self._captures.add(task)
+        task.add_done_callback(self._captures.discard)
+
+    def report(self) -> List[Dict[str, Any]]:
+        # Most total time first
+        return [
+            {
+                **{name: value for name, value in entry.items() if name not in ("total_seconds", "max_seconds")},
+                "total_ms": round(entry["total_seconds"] * 1000, 3),
+                "mean_ms": round(entry["total_seconds"] * 1000 / entry["count"], 3),
+                "max_ms": round(entry["max_seconds"] * 1000, 3),
+            }
+            for entry in sorted(self.entries.values(), key=lambda entry: entry["total_seconds"], reverse=True)
+        ]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+slow_query_log = SlowQueryLog()
+
+QUERY_OBSERVERS.append(slow_query_log.observe)
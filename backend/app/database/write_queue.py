@@ -0,0 +1,117 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from .init_db import database
+from .cache import write_generation
+from .generation import GENERATION_QUERY
+from .query_stats import QueryStats, current_query_stats
+
+# How long the writer waits after the first queued write for others to join it,
+# and the most writes committed together. WRITE_BATCH_WINDOW_MS=0 still batches
+# whatever queued up while the previous commit ran, without adding any delay.
+WRITE_BATCH_WINDOW = float(os.environ.get("WRITE_BATCH_WINDOW_MS", "2")) / 1000
+WRITE_BATCH_MAX = int(os.environ.get("WRITE_BATCH_MAX", "128"))
+
+Write = Callable[[], Awaitable[Any]]
+
+class WriteQueue:
+    """Runs writes on a single task, committing each batch in one transaction.
+
+    Every write gets its own savepoint, so one that raises (a 404, a constraint
+    violation) is rolled back alone and its caller gets the exception, while
+    the rest of the batch still commits. submit() returns once the write's
+    batch has committed, so post-commit work like cache eviction stays with
+    the caller, along with the write generation the batch committed at.
+    """
+
+    def __init__(self, window: float = WRITE_BATCH_WINDOW, max_batch: int = WRITE_BATCH_MAX):
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batches = 0
+        self._writes = 0
+        self._largest = 0
+
+    def start(self) -> None:
+        # The queue and task belong to the event loop that is running now
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        # Writes still waiting never ran; don't leave their callers hanging
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+        self._worker = None
+        self._queue = None
+
+    async def submit(self, write: Write) -> Tuple[Any, int]:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        # The write runs on the queue's task; its queries still count towards this request
+        self._queue.put_nowait((write, future, current_query_stats.get()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Write, asyncio.Future, Optional[QueryStats]]]:
+        batch = [await self._queue.get()]
+        if self.window > 0:
+            await asyncio.sleep(self.window)
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _commit(self, batch: List[Tuple[Write, asyncio.Future, Optional[QueryStats]]]) -> None:
+        outcomes = []
+        try:
+            async with database.transaction():
+                # The writer holds the write lock from BEGIN, so these bracket exactly this batch
+                before = await database.fetch_val(query=GENERATION_QUERY)
+                for write, future, stats in batch:
+                    token = current_query_stats.set(stats)
+                    try:
+                        async with database.transaction():
+                            outcomes.append((future, await write(), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+                    finally:
+                        current_query_stats.reset(token)
+                after = await database.fetch_val(query=GENERATION_QUERY)
+        except Exception as exc:
+            # The commit itself failed, so nothing in the batch was written
+            outcomes = [(future, None, exc) for _, future, _ in batch]
+        else:
+            write_generation.observe(before, after)
+
+        for future, result, exc in outcomes:
+            if future.done():  # the caller went away
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result((result, after))
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            self._batches += 1
+            self._writes += len(batch)
+            self._largest = max(self._largest, len(batch))
+            await self._commit(batch)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self._batches,
+            "writes": self._writes,
+            "largest_batch": self._largest,
+            "window_ms": self.window * 1000,
+        }
+
+write_queue = WriteQueue()
@@ -1,16 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 import os
 from .auth.oauth import get_current_user
-from .routes import items, tags, containers
-from .database.init_db import create_db_and_tables
-import secrets
+from .auth.shared_secrets import load_shared_secrets
+from .routes import items, tags, containers, export, imports, metrics, admin
+from .database.init_db import create_db_and_tables, database, read_database
+from .database.write_queue import write_queue
+from .middleware import ConditionalGetMiddleware, MetricsMiddleware, ProfilingMiddleware, ServerTimingMiddleware, SharedSecretSessionMiddleware
+from .static_assets import AssetIndex
 
 app = FastAPI(title="Binventory API")
 
+# ETags and 304s for API reads; added first so CORS headers still wrap the 304s
+app.add_middleware(ConditionalGetMiddleware)
+
 # Configure CORS
 frontend_url = os.environ.get("FRONTEND_URL", "http://localhost:3000")
 app.add_middleware(
@@ -22,15 +25,25 @@ app.add_middleware(
 )
 
 # Add session middleware - required for OAuth authentication
-app.add_middleware(
-    SessionMiddleware, 
-    secret_key=secrets.token_urlsafe(32)
-)
+app.add_middleware(SharedSecretSessionMiddleware, secret_name="session")
+
+# Server-Timing with the request's SQL statement count and time
+app.add_middleware(ServerTimingMiddleware)
+
+# Times everything, including 304s and CORS preflights
+app.add_middleware(MetricsMiddleware)
+
+# Outermost, so a profiled request includes every middleware
+app.add_middleware(ProfilingMiddleware)
 
 # Include routers
 app.include_router(items.router, prefix="/api", tags=["Items"])
 app.include_router(tags.router, prefix="/api", tags=["Tags"])
 app.include_router(containers.router, prefix="/api", tags=["Containers"])
+app.include_router(export.router, prefix="/api", tags=["Export"])
+app.include_router(imports.router, prefix="/api", tags=["Import"])
+app.include_router(admin.router, prefix="/api", tags=["Admin"])
+app.include_router(metrics.router)
 
 # Include authentication router
 from .auth.oauth import router as auth_router
@@ -39,25 +52,33 @@ app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
 # Get static files directory from environment or use default
 static_files_dir = os.environ.get("STATIC_FILES_DIR", "../static")
 
-# Serve static files if directory exists
+# Serve the built frontend from an index made once at startup
 if os.path.exists(static_files_dir):
-    app.mount("/assets", StaticFiles(directory=f"{static_files_dir}/assets"), name="assets")
+    asset_index = AssetIndex(static_files_dir)
     
     @app.get("/{path:path}", include_in_schema=False)
-    async def serve_frontend(path: str):
-        # Return the index.html for any frontend routes
-        index_path = f"{static_files_dir}/index.html"
-        if os.path.exists(f"{static_files_dir}/{path}"):
-            return FileResponse(f"{static_files_dir}/{path}")
-        elif os.path.exists(index_path):
-            return FileResponse(index_path)
-        else:
+    async def serve_frontend(path: str, request: Request):
+        # Known files are served as-is and anything else gets index.html for the frontend routes
+        asset = asset_index.lookup(path)
+        if asset is None:
             raise HTTPException(status_code=404, detail="Resource not found")
+        return asset_index.respond(asset, request)
 
 @app.on_event("startup")
 async def startup():
     # Create tables on startup
     await create_db_and_tables()
+    load_shared_secrets()
+    await database.connect()
+    await read_database.connect()
+    write_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Stop taking writes, then close the pooled connections
+    await write_queue.stop()
+    await read_database.disconnect()
+    await database.disconnect()
 
 @app.get("/api/healthcheck", tags=["Health"])
 async def healthcheck():
@@ -0,0 +1,201 @@
+import os
+import re
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple
+from .database.connections import QUERY_OBSERVERS, SQLITE_PROFILE
+from .database.init_db import database, read_database
+from .database.cache import count_cache, response_cache, write_generation
+from .database.write_queue import write_queue
+
+# Each worker process keeps its own series. Updates happen on the event loop
+# thread, so plain dict and list updates need no locks.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[str, ...]
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self.values[labels] = value
+
+class Histogram(Metric):
+    """Bucket counts per label set; observe() does one bisect and two additions.
+
+    Counts are kept per bucket and only made cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.counts: Dict[Labels, List[int]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.values[labels] = 0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.values[labels] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else format_value(bound)
+                bucket_labels = format_labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(self.values[labels])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        # Called at scrape time for values that are cheaper to read than to track
+        self.collectors: List[Callable[[], Awaitable[Iterable[Metric]]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    async def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for metric in await collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template, method and status.", ("route", "method", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.", ("route", "method")
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body bytes sent.", ("route", "method"), buckets=SIZE_BUCKETS
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled."
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency by database, method and statement type.",
+    ("database", "method", "statement"), buckets=SQL_LATENCY_BUCKETS
+))
+db_query_rows = registry.register(Counter(
+    "db_query_rows_total", "Rows returned by SQL statements.", ("database", "method", "statement")
+))
+
+# Leading keyword of a statement: SELECT, INSERT, WITH, PRAGMA...
+STATEMENT_KEYWORD = re.compile(r"\s*(\w+)")
+
+def record_query(role: str, method: str, query, values, seconds: float, rows: int) -> None:
+    match = STATEMENT_KEYWORD.match(query) if isinstance(query, str) else None
+    labels = (role, method, match.group(1).upper() if match else "OTHER")
+    db_query_duration.observe(seconds, labels)
+    if rows:
+        db_query_rows.inc(labels, rows)
+
+QUERY_OBSERVERS.append(record_query)
+
+def page_cache_limit(cache_size: int, page_size: int) -> int:
+    # Negative cache_size is a limit in KiB, positive a number of pages
+    return -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+
+async def collect_sqlite() -> List[Metric]:
+    path = database.url.database
+    file_bytes = Gauge("sqlite_file_bytes", "Size of the database file.")
+    wal_bytes = Gauge("sqlite_wal_bytes", "Size of the write-ahead log file.")
+    cache_limit = Gauge("sqlite_page_cache_limit_bytes", "Page cache limit summed over open connections.", ("database",))
+    connections = Gauge("sqlite_connections", "Open pooled connections.", ("database",))
+
+    for gauge, filename in ((file_bytes, path), (wal_bytes, path + "-wal")):
+        gauge.set(os.path.getsize(filename) if os.path.exists(filename) else 0)
+
+    page_size = await read_database.fetch_val(query="PRAGMA page_size")
+    per_connection = page_cache_limit(int(SQLITE_PROFILE["cache_size"]), page_size)
+    for db in (database, read_database):
+        opened = db._backend._pool._opened
+        connections.set(opened, (db.role,))
+        cache_limit.set(per_connection * opened, (db.role,))
+
+    return [file_bytes, wal_bytes, cache_limit, connections]
+
+async def collect_caches() -> List[Metric]:
+    hits = Counter("cache_hits_total", "Cache lookups that found an entry.", ("cache",))
+    misses = Counter("cache_misses_total", "Cache lookups that found nothing.", ("cache",))
+    entries = Gauge("cache_entries", "Entries currently cached.", ("cache",))
+    weight = Gauge("cache_weight", "Summed weight of cached entries (bytes for responses).", ("cache",))
+    for name, cache in (("responses", response_cache), ("counts", count_cache)):
+        stats = cache.stats()
+        hits.inc((name,), stats["hits"])
+        misses.inc((name,), stats["misses"])
+        entries.set(stats["entries"], (name,))
+        weight.set(stats["weight"], (name,))
+
+    foreign = Counter("cache_foreign_invalidations_total", "Local caches dropped after another worker wrote.")
+    foreign.inc(amount=write_generation.foreign_writes)
+
+    queue = write_queue.stats()
+    batches = Counter("write_queue_batches_total", "Transactions committed by the write queue.")
+    batches.inc(amount=queue["batches"])
+    writes = Counter("write_queue_writes_total", "Writes committed by the write queue.")
+    writes.inc(amount=queue["writes"])
+
+    return [hits, misses, entries, weight, foreign, batches, writes]
+
+registry.collectors.extend([collect_sqlite, collect_caches])
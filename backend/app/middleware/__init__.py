@@ -0,0 +1,5 @@
+from .conditional import ConditionalGetMiddleware
+from .metrics import MetricsMiddleware
+from .server_timing import ServerTimingMiddleware
+from .profiling import ProfilingMiddleware
+from .sessions import SharedSecretSessionMiddleware
@@ -0,0 +1,69 @@
+import hashlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..auth.oauth import user_from_authorization
+from ..database.cache import write_generation
+
+# GET routes under /api/ whose responses do not derive from the inventory
+UNVERSIONED_PATHS = ("/api/auth/", "/api/admin/", "/api/healthcheck", "/api/search/stats", "/api/cache/stats")
+
+def make_etag(generation: int, authorization: str, target: str) -> str:
+    # Bound to the caller's credentials and the requested URL, so neither a request
+    # without them nor another route's ETag can get a 304
+    binding = hashlib.sha256(f"{authorization}\n{target}".encode()).hexdigest()[:12]
+    return f'W/"{generation}-{binding}"'
+
+def request_target(scope: Scope) -> str:
+    query_string = scope.get("query_string", b"")
+    return scope["path"] + ("?" + query_string.decode("latin-1") if query_string else "")
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # "*" is never honoured: it would answer for a URL that may not exist
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return etag in candidates or etag[2:] in candidates
+
+class ConditionalGetMiddleware:
+    """ETags for GET /api/ responses, taken from the database write generation.
+
+    The generation is known before the route runs, so an If-None-Match that
+    still matches is answered with 304 without running the route. The bearer
+    token is checked first, so a missing or expired one still gets the
+    route's 401.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/api/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.prefix)
+            or scope["path"].startswith(UNVERSIONED_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        authorization = headers.get("authorization", "")
+        etag = make_etag(await write_generation.current(), authorization, request_target(scope))
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag) and user_from_authorization(authorization) is not None:
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag.encode()), (b"cache-control", b"private, no-cache")],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = MutableHeaders(scope=message)
+                response_headers["etag"] = etag
+                response_headers["cache-control"] = "private, no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,78 @@
+import time
+from typing import List, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..metrics import http_in_flight, http_request_duration, http_requests, http_response_size
+
+def endpoint_routes(routes) -> List:
+    # Every endpoint route, looking inside routers that newer FastAPI versions
+    # include as a single entry
+    flat = []
+    for route in routes:
+        if hasattr(route, "path_regex"):
+            flat.append(route)
+        elif hasattr(route, "original_router"):
+            flat.extend(endpoint_routes(route.original_router.routes))
+    return flat
+
+def route_path(route, request_path: str) -> Optional[str]:
+    # The template of route if it matches request_path. Routes of an included
+    # router may only know their path below its prefix, which is put back here.
+    if route.path_regex.match(request_path):
+        return route.path
+    for position in range(1, len(request_path)):
+        if request_path[position] == "/" and route.path_regex.match(request_path[position:]):
+            return request_path[:position] + route.path
+    return None
+
+class MetricsMiddleware:
+    """Request count, latency, response size and in-flight gauge for every HTTP request.
+
+    Labelled by route template rather than path, so /api/items/1 and
+    /api/items/2 share one series.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes: Optional[List] = None
+
+    def route_template(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is not None and hasattr(route, "path_regex"):
+            return route_path(route, scope["path"]) or route.path
+
+        # Answered before routing, e.g. a 304 from ConditionalGetMiddleware
+        if self._routes is None and "app" in scope:
+            self._routes = endpoint_routes(scope["app"].router.routes)
+        for candidate in self._routes or ():
+            if scope["method"] in (getattr(candidate, "methods", None) or (scope["method"],)):
+                path = route_path(candidate, scope["path"])
+                if path:
+                    return path
+        return "<unmatched>"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_in_flight.dec()
+            labels = (self.route_template(scope), scope["method"])
+            http_requests.inc(labels + (str(status),))
+            http_request_duration.observe(time.perf_counter() - started, labels)
+            http_response_size.observe(size, labels)
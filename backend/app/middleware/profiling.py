@@ -0,0 +1,62 @@
+import asyncio
+import time
+from urllib.parse import parse_qsl
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..auth.oauth import admin_from_authorization
+from ..profiling import RequestSampler, new_profile_id, save_profile
+
+def profile_requested(scope: Scope) -> bool:
+    # An "X-Profile: 1" header or a profile=1 query parameter
+    query_string = scope.get("query_string", b"")
+    if b"profile=" in query_string and ("profile", "1") in parse_qsl(query_string.decode("latin-1")):
+        return True
+    return any(name == b"x-profile" and value == b"1" for name, value in scope["headers"])
+
+class ProfilingMiddleware:
+    """Runs the sampling profiler for requests that ask for it with an admin token.
+
+    The response carries an X-Profile-Id header naming the collapsed-stack
+    profile, which is served by GET /api/admin/profiles/{profile_id}. Every
+    other request only pays for the flag check.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        admin = admin_from_authorization(Headers(scope=scope).get("authorization", ""))
+        if admin is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+        sampler = RequestSampler(asyncio.current_task())
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message)["x-profile-id"] = profile_id
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            details = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "user": admin,
+                "created": time.time(),
+            }
+            await asyncio.to_thread(save_profile, profile_id, sampler, details)
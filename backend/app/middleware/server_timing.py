@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..database.query_stats import QueryStats, current_query_stats
+
+# REQUEST_LOG=1 writes one JSON line per request to the "binventory.requests" logger
+REQUEST_LOG = os.environ.get("REQUEST_LOG", "").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger("binventory.requests")
+
+def server_timing(stats: QueryStats, elapsed: float) -> str:
+    queries = "1 query" if stats.count == 1 else f"{stats.count} queries"
+    return f'db;dur={stats.seconds * 1000:.2f};desc="{queries}", app;dur={elapsed * 1000:.2f}'
+
+class ServerTimingMiddleware:
+    """Counts the SQL statements each request runs and reports them in a Server-Timing header.
+
+    The header reads e.g. `db;dur=1.84;desc="3 queries", app;dur=4.10`, so
+    browser dev tools show the database share of every response. Statements
+    run after the response has started, as in a streamed export, are only
+    included in the log line.
+    """
+
+    def __init__(self, app: ASGIApp, log_requests: bool = REQUEST_LOG):
+        self.app = app
+        self.log_requests = log_requests
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("server-timing", server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            if self.log_requests:
+                logger.info(json.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "queries": stats.count,
+                    "db_ms": round(stats.seconds * 1000, 2),
+                }))
@@ -0,0 +1,21 @@
+import itsdangerous
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+from ..auth.shared_secrets import shared_secret
+
+class SharedSecretSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware signing with a shared secret that is looked up on the first request.
+
+    The middleware stack is built before the startup handlers run, so taking
+    the key at construction would mean generating it when the app is imported.
+    """
+
+    def __init__(self, app: ASGIApp, secret_name: str, **options):
+        super().__init__(app, secret_key="", **options)
+        self.secret_name = secret_name
+        self.signer = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.signer is None and scope["type"] in ("http", "websocket"):
+            self.signer = itsdangerous.TimestampSigner(shared_secret(self.secret_name))
+        await super().__call__(scope, receive, send)
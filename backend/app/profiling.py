@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+# Seconds between samples of a profiled request
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", "1")) / 1000
+
+# Profiles are files, so whichever worker serves the admin endpoint can read them
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+
+PROFILE_ID = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+
+def frame_label(frame) -> str:
+    # One flame graph box per function; ";" separates frames in collapsed stacks
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+def running_stack(frame, root) -> Optional[List[str]]:
+    # The frames from the task's outermost coroutine down to the one executing,
+    # or None when the task isn't the one on the thread
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        if frame is root:
+            return [frame_label(frame) for frame in reversed(frames)]
+        frame = frame.f_back
+    return None
+
+def awaiting_stack(awaitable) -> List[str]:
+    # The chain of suspended coroutines down to what the task is waiting on
+    stack = []
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "ag_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(frame_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "ag_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    stack.append(f"<awaiting {type(awaitable).__name__}>" if awaitable is not None else "<awaiting>")
+    return stack
+
+class RequestSampler:
+    """Samples the stack of one asyncio task from a background thread.
+
+    While the task runs, its frames are read from the event loop thread; while
+    it is suspended, the coroutines it is awaiting through are recorded
+    instead, so time spent waiting on aiosqlite or the write queue shows up
+    under the await that caused it. Other requests are never sampled.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float = PROFILE_INTERVAL):
+        self.task = task
+        self.interval = interval
+        self.loop_thread = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        coro = self.task.get_coro()
+        root = getattr(coro, "cr_frame", None)
+        if root is None:
+            return
+        stack = running_stack(sys._current_frames().get(self.loop_thread), root)
+        if stack is None:
+            stack = awaiting_stack(coro)
+        # A sample taken while the request was stopping the sampler is just the profiler itself
+        if self._stopped.is_set():
+            return
+        self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        # Brendan Gregg's collapsed format, for flamegraph.pl or speedscope
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def new_profile_id() -> str:
+    return f"{int(time.time() * 1000)}-{secrets.token_hex(4)}"
+
+def save_profile(profile_id: str, sampler: RequestSampler, details: dict) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.collapsed"), "w") as stream:
+        stream.write(sampler.collapsed())
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), "w") as stream:
+        json.dump({"id": profile_id, "samples": sampler.samples, "interval_ms": sampler.interval * 1000, **details}, stream)
+
+    # Only the newest PROFILE_KEEP are kept
+    for stale in list_profile_ids()[PROFILE_KEEP:]:
+        for suffix in (".collapsed", ".json"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, stale + suffix))
+            except FileNotFoundError:
+                pass
+
+def list_profile_ids() -> List[str]:
+    # Newest first; ids start with a millisecond timestamp
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    ids = [name[:-len(".json")] for name in os.listdir(PROFILE_DIR) if name.endswith(".json")]
+    return sorted((profile_id for profile_id in ids if PROFILE_ID.match(profile_id)), key=lambda profile_id: int(profile_id.split("-")[0]), reverse=True)
+
+def load_profile_details(profile_id: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.json")) as stream:
+            return json.load(stream)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def load_collapsed_stacks(profile_id: str) -> Optional[str]:
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.collapsed")) as stream:
+            return stream.read()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,38 @@
+import re
+
+# The statement count ServerTimingMiddleware puts in the Server-Timing header
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) quer(?:y|ies)"')
+
+# Most SQL statements each endpoint may run with cold caches, including the
+# write generation read done by ConditionalGetMiddleware. Lower a budget when
+# a route gets cheaper; raising one should come with a reason.
+QUERY_BUDGETS = {
+    ("GET", "/api/items"): 3,
+    ("GET", "/api/items?search=bolt"): 3,
+    ("GET", "/api/items/1"): 2,
+    ("GET", "/api/areas"): 2,
+    ("GET", "/api/areas/Garage"): 2,
+    ("GET", "/api/containers"): 2,
+    ("GET", "/api/containers/Shelf"): 2,
+    ("GET", "/api/bins"): 2,
+    ("GET", "/api/bins/A1"): 2,
+    ("GET", "/api/tags"): 2,
+    ("GET", "/api/tags/metric"): 7,
+    ("GET", "/api/search/autocomplete?q=bo"): 3,
+    ("POST", "/api/items"): 2,
+    ("PUT", "/api/items/1"): 3,
+    ("DELETE", "/api/items/2"): 4,
+}
+
+def query_count(response) -> int:
+    # Statements run for a response from the app, read back from its Server-Timing header
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+    if match is None:
+        raise AssertionError("Response has no Server-Timing query count")
+    return int(match.group(1))
+
+def assert_max_queries(response, limit: int, label: str = "") -> int:
+    count = query_count(response)
+    if count > limit:
+        raise AssertionError(f"{label or response.request.url} ran {count} SQL statements, budget is {limit}")
+    return count
@@ -0,0 +1,51 @@
+import functools
+import json
+from typing import Any, Callable, Iterable
+from fastapi.responses import JSONResponse, Response
+from .database.cache import response_cache
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the standard library encoder
+    orjson = None
+
+class TrustedJSONResponse(JSONResponse):
+    """JSON response for payloads built straight from database rows.
+
+    Returning it from a route skips the response_model validation and
+    jsonable_encoder pass, so only use it for dicts that already have the
+    documented shape. The response_model still describes the route in the docs.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def cached_response(dependencies: Callable[..., Iterable]):
+    """Caches the rendered JSON body of a read route in response_cache.
+
+    The entry is keyed by route and arguments; dependencies receives the same
+    arguments and returns the (kind, name) pairs whose writes evict it.
+    """
+
+    def decorator(route):
+        @functools.wraps(route)
+        async def wrapper(**kwargs):
+            key = (route.__name__, tuple(sorted((name, value) for name, value in kwargs.items() if name != "current_user")))
+            body = response_cache.get(key)
+            
+            if body is None:
+                version = response_cache.version
+                result = await route(**kwargs)
+                body = result.body if isinstance(result, Response) else TrustedJSONResponse(result).body
+                
+                # A write landed while we were reading, so this body may already be stale
+                if response_cache.version == version:
+                    response_cache.set(key, body, dependencies(**kwargs))
+            
+            return Response(body, media_type="application/json")
+        
+        return wrapper
+    
+    return decorator
@@ -1,3 +1,5 @@
 from .items import router as items_router
 from .tags import router as tags_router
 from .containers import router as containers_router
+from .export import router as export_router
+from .imports import router as imports_router
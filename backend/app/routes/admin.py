@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from ..database.slow_queries import slow_query_log
+from ..profiling import list_profile_ids, load_profile_details, load_collapsed_stacks
+from ..auth.oauth import get_admin_user
+
+router = APIRouter()
+
+@router.get("/admin/slow-queries")
+async def get_slow_queries(
+    current_user: str = Depends(get_admin_user)
+):
+    # Slowest statements by total time, with their captured query plans
+    return {
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "queries": slow_query_log.report()
+    }
+
+@router.delete("/admin/slow-queries")
+async def clear_slow_queries(
+    current_user: str = Depends(get_admin_user)
+):
+    slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
+
+@router.get("/admin/profiles")
+async def get_profiles(
+    current_user: str = Depends(get_admin_user)
+):
+    # Requests profiled with "X-Profile: 1" or ?profile=1, newest first
+    profiles = [load_profile_details(profile_id) for profile_id in list_profile_ids()]
+    return {"profiles": [profile for profile in profiles if profile is not None]}
+
+@router.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(
+    profile_id: str,
+    current_user: str = Depends(get_admin_user)
+):
+    # Collapsed stacks, one "frame;frame;frame count" line each, for flamegraph.pl or speedscope
+    stacks = load_collapsed_stacks(profile_id)
+    
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return PlainTextResponse(stacks)
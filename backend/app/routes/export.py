@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from typing import Literal
+import csv
+import io
+import json
+from ..database import read_database
+from ..auth.oauth import get_current_user
+
+router = APIRouter()
+
+# Rows are buffered into chunks of this size before being sent to the client
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_FIELDS = ["id", "name", "description", "area", "container", "bin", "quantity", "cost", "url", "tags"]
+
+# One ordered pass over items; tags are packed as a JSON array so commas survive
+EXPORT_QUERY = """
+    SELECT i.*,
+        CASE WHEN COUNT(it.id) = 0 THEN '[]' ELSE json_group_array(it.tag) END as tags
+    FROM items i
+    LEFT JOIN items_tags it ON i.id = it.item_id
+    GROUP BY i.id
+    ORDER BY i.id
+"""
+
+async def iterate_export_rows():
+    async for row in read_database.iterate(query=EXPORT_QUERY):
+        item_dict = dict(row)
+        item_dict["tags"] = json.loads(item_dict["tags"])
+        yield item_dict
+
+async def stream_ndjson():
+    lines = []
+    async for item_dict in iterate_export_rows():
+        lines.append(json.dumps(item_dict))
+        if len(lines) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+async def stream_csv():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+
+    rows = 0
+    async for item_dict in iterate_export_rows():
+        # Keep tags as a JSON array so tags containing commas round-trip
+        item_dict["tags"] = json.dumps(item_dict["tags"])
+        writer.writerow(item_dict)
+        rows += 1
+        if rows >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+
+    yield buffer.getvalue()
+
+@router.get("/export")
+async def export_items(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: str = Depends(get_current_user)
+):
+    if format == "csv":
+        body, media_type = stream_csv(), "text/csv"
+    else:
+        body, media_type = stream_ndjson(), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="binventory-export.{format}"'}
+    )
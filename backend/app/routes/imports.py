@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from typing import Literal, Optional
+from ..schemas import ImportResult
+from ..database.bulk_import import ImportFileError, import_items, detect_format
+from ..auth.oauth import get_current_user
+
+router = APIRouter()
+
+@router.post("/import", response_model=ImportResult)
+async def import_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    current_user: str = Depends(get_current_user)
+):
+    # Fall back to the file extension when no format is given
+    try:
+        return await import_items(file.file, format or detect_format(file.filename))
+    except ImportFileError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
@@ -0,0 +1,13 @@
+from fastapi import HTTPException
+from typing import Optional
+from ..database import decode_id_cursor
+
+# Largest page of embedded items a detail endpoint returns in one response
+ITEMS_LIMIT_MAX = 1000
+
+def items_page_start(cursor: Optional[str]) -> int:
+    # Decode the item cursor up front so a bad token fails before any query runs
+    try:
+        return decode_id_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
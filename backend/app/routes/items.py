@@ -1,12 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text, select, func
-from typing import List, Optional
-from ..schemas import Item, ItemCreate, ItemUpdate, SearchResult
-from ..database import database
+from typing import List, Literal, Optional
+import json
+import os
+from pydantic import ValidationError
+from ..schemas import Item, ItemCreate, ItemUpdate, SearchResult, BatchRequest, BatchResult
+from ..database import (
+    database, read_database, encode_cursor, decode_cursor, count_cache, response_cache, write_generation, item_cache_keys, invalidate_item_caches,
+    ITEM_TAGS_JSON, decode_item_row, decode_item_rows
+)
+from ..database.write_queue import write_queue
+from ..database.generation import GENERATION_QUERY
+from ..database.queries import INSERT_ITEM_QUERY, INSERT_TAG_QUERY, item_insert_values, build_item_update
+from ..database.name_index import name_index, item_name_changes
 from ..auth.oauth import get_current_user
+from ..responses import TrustedJSONResponse
 
 router = APIRouter()
 
+# Upper bound on rows touched when a client asks for total=estimate
+ESTIMATE_COUNT_CAP = 1000
+
+# bm25 weights for the items_fts columns, in table order. Override with e.g.
+# SEARCH_WEIGHTS="name=10,description=4,area=1,container=1,bin=1"
+SEARCH_COLUMNS = ("name", "description", "area", "container", "bin")
+DEFAULT_SEARCH_WEIGHTS = {"name": 10.0, "description": 4.0, "area": 1.0, "container": 1.0, "bin": 1.0}
+
+def load_search_weights() -> dict:
+    weights = dict(DEFAULT_SEARCH_WEIGHTS)
+    for pair in os.environ.get("SEARCH_WEIGHTS", "").split(","):
+        if "=" in pair:
+            column, value = pair.split("=", 1)
+            if column.strip() in weights:
+                weights[column.strip()] = float(value)
+    return weights
+
+SEARCH_WEIGHTS = load_search_weights()
+SEARCH_WEIGHTS_SQL = ", ".join(repr(SEARCH_WEIGHTS[column]) for column in SEARCH_COLUMNS)
+
+# Tokens of context returned around each highlighted match
+SNIPPET_TOKENS = 12
+
 @router.get("/items", response_model=SearchResult)
 async def get_items(
     search: Optional[str] = None,
@@ -16,155 +50,207 @@ async def get_items(
     tag: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    total: Literal["exact", "estimate", "none"] = "exact",
+    highlight: bool = False,
     current_user: str = Depends(get_current_user)
 ):
-    # Build the query based on filters
-    if search:
-        # Use FTS for search
-        query = """
-            SELECT i.*, GROUP_CONCAT(it.tag) as tags
-            FROM items i
-            LEFT JOIN items_tags it ON i.id = it.item_id
-            WHERE i.id IN (
-                SELECT rowid FROM items_fts 
-                WHERE items_fts MATCH :search
-            )
-        """
-        params = {"search": search}
-    else:
-        query = """
-            SELECT i.*, GROUP_CONCAT(it.tag) as tags
-            FROM items i
-            LEFT JOIN items_tags it ON i.id = it.item_id
-            WHERE 1=1
-        """
-        params = {}
+    # Decode the keyset cursor up front so a bad token fails before any query runs
+    after_id = None
+    after_rank = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            after_id = int(position["id"])
+            if search:
+                after_rank = float(position["rank"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Build the filter clause
+    filters = ""
+    params = {}
     
-    # Apply filters
     if area:
-        query += " AND i.area = :area"
+        filters += " AND i.area = :area"
         params["area"] = area
     
     if container:
-        query += " AND i.container = :container"
+        filters += " AND i.container = :container"
         params["container"] = container
     
     if bin:
-        query += " AND i.bin = :bin"
+        filters += " AND i.bin = :bin"
         params["bin"] = bin
     
     if tag:
-        query += " AND i.id IN (SELECT item_id FROM items_tags WHERE tag = :tag)"
+        filters += " AND i.id IN (SELECT item_id FROM items_tags WHERE tag = :tag)"
         params["tag"] = tag
     
-    # Add grouping
-    query += " GROUP BY i.id"
-    
-    # Get total count
-    count_query = f"SELECT COUNT(*) FROM ({query}) as count_query"
-    total = await database.fetch_val(query=count_query, values=params)
+    if search:
+        # Use FTS for search
+        params["search"] = search
+        where = """
+            WHERE i.id IN (
+                SELECT rowid FROM items_fts 
+                WHERE items_fts MATCH :search
+            )
+        """ + filters
+    else:
+        where = " WHERE 1=1" + filters
+    
+    # Get total count according to the requested strategy
+    total_count = None
+    total_is_estimate = False
+    if total != "none":
+        cache_key = (search, area, container, bin, tag)
+        total_count = count_cache.get(cache_key)
+        
+        if total_count is None and total == "estimate":
+            if params:
+                # Count at most ESTIMATE_COUNT_CAP matches instead of all of them;
+                # reaching the cap makes the total a lower bound
+                estimate_query = f"""
+                    SELECT COUNT(*) FROM (
+                        SELECT 1 FROM items i {where} LIMIT {ESTIMATE_COUNT_CAP}
+                    )
+                """
+                total_count = await read_database.fetch_val(query=estimate_query, values=params)
+                total_is_estimate = total_count >= ESTIMATE_COUNT_CAP
+            else:
+                # The largest rowid is an index lookup and close enough without filters
+                total_count = await read_database.fetch_val(query="SELECT COALESCE(MAX(id), 0) FROM items")
+                total_is_estimate = True
+        elif total_count is None:
+            # Items are unique per row, so no join or GROUP BY is needed to count them
+            version = count_cache.version
+            count_query = f"SELECT COUNT(*) FROM items i {where}"
+            total_count = await read_database.fetch_val(query=count_query, values=params)
+            
+            # A write landed while we were counting, so this total may already be stale
+            if count_cache.version == version:
+                count_cache.set(cache_key, total_count)
     
-    # Add pagination
-    query += " LIMIT :limit OFFSET :skip"
+    # Select the ids (and rank) of one page first, so only those rows are joined with tags
+    if search:
+        # Best bm25 matches first (lower is better), id breaks ties
+        page_query = f"""
+            SELECT id, rank FROM (
+                SELECT items_fts.rowid AS id, bm25(items_fts, {SEARCH_WEIGHTS_SQL}) AS rank
+                FROM items_fts
+                JOIN items i ON i.id = items_fts.rowid
+                WHERE items_fts MATCH :search {filters}
+            )
+        """
+        if after_id is not None:
+            page_query += " WHERE (rank, id) > (:after_rank, :after_id)"
+            params["after_rank"] = after_rank
+            params["after_id"] = after_id
+        page_query += " ORDER BY rank, id"
+    else:
+        page_query = f"SELECT i.id, 0 AS rank FROM items i WHERE 1=1 {filters}"
+        # Keyset pagination: seek past the last id of the previous page
+        if after_id is not None:
+            page_query += " AND i.id > :after_id"
+            params["after_id"] = after_id
+        page_query += " ORDER BY i.id"
+    
+    # Add pagination (skip is only honoured for offset-based clients)
+    if after_id is not None:
+        page_query += " LIMIT :limit"
+    else:
+        page_query += " LIMIT :limit OFFSET :skip"
+        params["skip"] = skip
     params["limit"] = limit
-    params["skip"] = skip
     
-    # Execute the query
-    result = await database.fetch_all(query=query, values=params)
-    
-    # Process the results to include tags
-    items = []
-    for row in result:
-        # Convert row to dict using dict() instead of items()
-        item_dict = dict(row)
-        # Remove tags from the dict as we'll process it separately
-        tags_str = item_dict.pop('tags', None)
-        
-        tags = []
-        if tags_str:
-            tag_list = tags_str.split(',')
-            tags = [{"id": -1, "item_id": item_dict['id'], "tag": tag} for tag in tag_list]
-        
-        item_dict['tags'] = tags
-        items.append(item_dict)
+    query = f"""
+        SELECT i.*, p.rank, {ITEM_TAGS_JSON} as tags
+        FROM ({page_query}) p
+        JOIN items i ON i.id = p.id
+        ORDER BY p.rank, i.id
+    """
     
-    return {"items": items, "total": total}
+    # Execute the query
+    result = await read_database.fetch_all(query=query, values=params)
+    items = decode_item_rows(result)
+    
+    # A full page means there may be more rows after the last one
+    next_cursor = None
+    if items and len(items) == limit:
+        position = {"id": items[-1]["id"]}
+        if search:
+            position["rank"] = result[-1]["rank"]
+        next_cursor = encode_cursor(position)
+    
+    # Highlight matches for this page only, using FTS5's rowid lookup
+    if highlight and search and items:
+        snippet_query = f"""
+            SELECT rowid AS id, snippet(items_fts, -1, '<mark>', '</mark>', '...', {SNIPPET_TOKENS}) AS snippet
+            FROM items_fts
+            WHERE items_fts MATCH :search
+            AND rowid IN ({", ".join(str(item["id"]) for item in items)})
+        """
+        snippet_rows = await read_database.fetch_all(query=snippet_query, values={"search": search})
+        snippets = {row["id"]: row["snippet"] for row in snippet_rows}
+        for item in items:
+            item["snippet"] = snippets.get(item["id"])
+    
+    # Rows are decoded into the SearchResult shape already, so skip re-validating them
+    return TrustedJSONResponse({
+        "items": items,
+        "total": total_count,
+        "total_is_estimate": total_is_estimate,
+        "next_cursor": next_cursor,
+    })
 
 @router.post("/items", response_model=Item)
 async def create_item(
     item: ItemCreate,
     current_user: str = Depends(get_current_user)
 ):
-    # Insert the item
-    query = """
-        INSERT INTO items (name, description, area, container, bin, quantity, cost, url)
-        VALUES (:name, :description, :area, :container, :bin, :quantity, :cost, :url)
-        RETURNING id
-    """
-    values = {
-        "name": item.name,
-        "description": item.description,
-        "area": item.area,
-        "container": item.container,
-        "bin": item.bin,
-        "quantity": item.quantity,
-        "cost": item.cost,
-        "url": item.url
-    }
-    
-    item_id = await database.execute(query=query, values=values)
-    
-    # Insert tags if any
-    if item.tags:
-        tag_values = []
-        for tag in item.tags:
-            tag_values.append({
-                "item_id": item_id,
-                "tag": tag
-            })
+    async def write():
+        # Insert the item
+        item_id = await database.execute(query=INSERT_ITEM_QUERY, values=item_insert_values(item))
         
-        tag_query = """
-            INSERT INTO items_tags (item_id, tag)
-            VALUES (:item_id, :tag)
-        """
+        # Insert tags if any, in one multi-row INSERT that hands back their ids
+        tags = []
+        if item.tags:
+            rows = ", ".join(f"(:item_id, :tag{n})" for n in range(len(item.tags)))
+            insert_tags_query = f"INSERT INTO items_tags (item_id, tag) VALUES {rows} RETURNING id, tag"
+            inserted = await database.fetch_all(
+                query=insert_tags_query,
+                values={"item_id": item_id, **{f"tag{n}": tag for n, tag in enumerate(item.tags)}}
+            )
+            tags = [{"id": row["id"], "item_id": item_id, "tag": row["tag"]} for row in inserted]
         
-        await database.execute_many(query=tag_query, values=tag_values)
+        return item_id, tags
+    
+    # Committed together with whatever other writes arrive alongside it
+    (item_id, tags), generation = await write_queue.submit(write)
+    
+    invalidate_item_caches(item_cache_keys(item_insert_values(item), item.tags or []))
+    name_index.apply(item_name_changes(item_insert_values(item), item.tags or []), generation)
     
     # Return the created item
-    return {**item.dict(), "id": item_id, "tags": [{"id": -1, "item_id": item_id, "tag": tag} for tag in item.tags]}
+    return {**item.dict(), "id": item_id, "tags": tags}
 
 @router.get("/items/{item_id}", response_model=Item)
 async def get_item(
     item_id: int,
     current_user: str = Depends(get_current_user)
 ):
-    query = """
-        SELECT i.*, GROUP_CONCAT(it.tag) as tags
+    query = f"""
+        SELECT i.*, {ITEM_TAGS_JSON} as tags
         FROM items i
-        LEFT JOIN items_tags it ON i.id = it.item_id
         WHERE i.id = :item_id
-        GROUP BY i.id
     """
     
-    result = await database.fetch_one(query=query, values={"item_id": item_id})
+    result = await read_database.fetch_one(query=query, values={"item_id": item_id})
     
     if not result:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    # Process the result to include tags
-    # Convert row to dict using dict() instead of items()
-    item_dict = dict(result)
-    # Remove tags from the dict as we'll process it separately
-    tags_str = item_dict.pop('tags', None)
-    
-    tags = []
-    if tags_str:
-        tag_list = tags_str.split(',')
-        tags = [{"id": -1, "item_id": item_id, "tag": tag} for tag in tag_list]
-    
-    item_dict['tags'] = tags
-    
-    return item_dict
+    return decode_item_row(result)
 
 @router.put("/items/{item_id}", response_model=Item)
 async def update_item(
@@ -172,176 +258,279 @@ async def update_item(
     item: ItemUpdate,
     current_user: str = Depends(get_current_user)
 ):
-    # Check if item exists
-    exists_query = "SELECT id FROM items WHERE id = :item_id"
-    exists = await database.fetch_one(query=exists_query, values={"item_id": item_id})
-    
-    if not exists:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    # Update the item
-    update_fields = []
-    values = {"item_id": item_id}
-    
-    if item.name is not None:
-        update_fields.append("name = :name")
-        values["name"] = item.name
-    
-    if item.description is not None:
-        update_fields.append("description = :description")
-        values["description"] = item.description
-    
-    if item.area is not None:
-        update_fields.append("area = :area")
-        values["area"] = item.area
-    
-    if item.container is not None:
-        update_fields.append("container = :container")
-        values["container"] = item.container
-    
-    if item.bin is not None:
-        update_fields.append("bin = :bin")
-        values["bin"] = item.bin
-    
-    if item.quantity is not None:
-        update_fields.append("quantity = :quantity")
-        values["quantity"] = item.quantity
-    
-    if item.cost is not None:
-        update_fields.append("cost = :cost")
-        values["cost"] = item.cost
-    
-    if item.url is not None:
-        update_fields.append("url = :url")
-        values["url"] = item.url
-    
-    if update_fields:
-        update_query = f"""
-            UPDATE items
-            SET {", ".join(update_fields)}
-            WHERE id = :item_id
+    update_query, values = build_item_update(item_id, item)
+    
+    # Everything below runs in one savepoint of a write_queue batch, so other readers never see half an update
+    async def write():
+        # Current row and tags (with ids) in one round trip; doubles as the existence check
+        current_query = """
+            SELECT i.*,
+                (SELECT json_group_array(json_object('id', it.id, 'tag', it.tag))
+                 FROM items_tags it WHERE it.item_id = i.id) as tags
+            FROM items i
+            WHERE i.id = :item_id
         """
+        current = await database.fetch_one(query=current_query, values={"item_id": item_id})
         
-        await database.execute(query=update_query, values=values)
-    
-    # Update tags if provided
-    if item.tags is not None:
-        # Delete existing tags
-        delete_tags_query = "DELETE FROM items_tags WHERE item_id = :item_id"
-        await database.execute(query=delete_tags_query, values={"item_id": item_id})
+        if not current:
+            raise HTTPException(status_code=404, detail="Item not found")
         
-        # Insert new tags
-        if item.tags:
-            tag_values = []
-            for tag in item.tags:
-                tag_values.append({
-                    "item_id": item_id,
-                    "tag": tag
-                })
+        old_values = dict(current)
+        old_tags = json.loads(old_values.pop("tags"))
+        
+        # RETURNING gives us the updated row without re-reading it
+        new_values = old_values
+        if update_query:
+            updated = await database.fetch_one(query=update_query + " RETURNING *", values=values)
+            new_values = dict(updated)
+        
+        # Only touch the tags that actually changed, so unchanged tags don't churn items_tags_fts
+        tags = old_tags
+        removed_tags = []
+        added_tags = []
+        if item.tags is not None:
+            wanted = list(dict.fromkeys(item.tags))
+            wanted_set = set(wanted)
+            # The first row of each wanted tag is kept; duplicate rows go like unwanted ones
+            tags = []
+            kept = set()
+            for tag in old_tags:
+                if tag["tag"] in wanted_set and tag["tag"] not in kept:
+                    tags.append(tag)
+                    kept.add(tag["tag"])
+                else:
+                    removed_tags.append(tag)
+            added_tags = [tag for tag in wanted if tag not in kept]
             
-            tag_query = """
-                INSERT INTO items_tags (item_id, tag)
-                VALUES (:item_id, :tag)
-            """
+            if removed_tags:
+                delete_tags_query = f"DELETE FROM items_tags WHERE id IN ({', '.join(str(tag['id']) for tag in removed_tags)})"
+                await database.execute(query=delete_tags_query)
             
-            await database.execute_many(query=tag_query, values=tag_values)
+            if added_tags:
+                # A single multi-row INSERT that hands back the new tag ids
+                rows = ", ".join(f"(:item_id, :tag{n})" for n in range(len(added_tags)))
+                insert_tags_query = f"INSERT INTO items_tags (item_id, tag) VALUES {rows} RETURNING id, tag"
+                inserted = await database.fetch_all(
+                    query=insert_tags_query,
+                    values={"item_id": item_id, **{f"tag{n}": tag for n, tag in enumerate(added_tags)}}
+                )
+                tags = tags + [{"id": row["id"], "tag": row["tag"]} for row in inserted]
+        
+        return old_values, old_tags, new_values, tags, removed_tags, added_tags
+    
+    (old_values, old_tags, new_values, tags, removed_tags, added_tags), generation = await write_queue.submit(write)
+    
+    # Tag pages of every tag the item had or has now show its location and quantity
+    invalidate_item_caches(
+        item_cache_keys(old_values, [tag["tag"] for tag in old_tags])
+        + item_cache_keys(new_values, added_tags)
+    )
+    name_index.apply(item_name_changes(old_values, [tag["tag"] for tag in removed_tags], -1), generation)
+    name_index.apply(item_name_changes(new_values, added_tags), generation)
     
     # Return the updated item
-    return await get_item(item_id, current_user)
+    return {**new_values, "tags": [{"id": tag["id"], "item_id": item_id, "tag": tag["tag"]} for tag in tags]}
 
 @router.delete("/items/{item_id}")
 async def delete_item(
     item_id: int,
     current_user: str = Depends(get_current_user)
 ):
-    # Check if item exists
-    exists_query = "SELECT id FROM items WHERE id = :item_id"
-    exists = await database.fetch_one(query=exists_query, values={"item_id": item_id})
+    async def write():
+        # Check if item exists, keeping its location for the name index
+        exists_query = "SELECT id, area, container, bin FROM items WHERE id = :item_id"
+        exists = await database.fetch_one(query=exists_query, values={"item_id": item_id})
+        
+        if not exists:
+            raise HTTPException(status_code=404, detail="Item not found")
+        
+        tags_query = "SELECT tag FROM items_tags WHERE item_id = :item_id"
+        old_tags = [row["tag"] for row in await database.fetch_all(query=tags_query, values={"item_id": item_id})]
+        
+        # Delete the tags explicitly; SQLite does not cascade unless foreign keys are enabled
+        await database.execute(query="DELETE FROM items_tags WHERE item_id = :item_id", values={"item_id": item_id})
+        
+        query = "DELETE FROM items WHERE id = :item_id"
+        await database.execute(query=query, values={"item_id": item_id})
+        
+        return dict(exists), old_tags
     
-    if not exists:
-        raise HTTPException(status_code=404, detail="Item not found")
+    (exists, old_tags), generation = await write_queue.submit(write)
     
-    # Delete the item (tags will be deleted via cascade)
-    query = "DELETE FROM items WHERE id = :item_id"
-    await database.execute(query=query, values={"item_id": item_id})
+    invalidate_item_caches(item_cache_keys(exists, old_tags))
+    name_index.apply(item_name_changes(exists, old_tags, -1), generation)
     
     return {"message": "Item deleted successfully"}
 
-@router.get("/search/autocomplete")
-async def search_autocomplete(
-    q: str,
-    limit: int = 10,
+@router.post("/items/batch", response_model=BatchResult)
+async def batch_items(
+    batch: BatchRequest,
     current_user: str = Depends(get_current_user)
 ):
-    # Search for items
-    items_query = """
-        SELECT DISTINCT name
-        FROM items_fts
-        WHERE items_fts MATCH :query
-        LIMIT :limit
-    """
-    
-    items = await database.fetch_all(
-        query=items_query, 
-        values={"query": q, "limit": limit}
-    )
-    
-    # Search for areas
-    areas_query = """
-        SELECT DISTINCT area
-        FROM items
-        WHERE area LIKE :query
-        LIMIT :limit
-    """
+    results = []
     
-    areas = await database.fetch_all(
-        query=areas_query, 
-        values={"query": f"%{q}%", "limit": limit}
-    )
+    # Tag and delete statements are collected and flushed with execute_many at the end
+    pending_tags = {}
+    clear_tags_ids = []
+    delete_ids = []
+    name_changes = []
     
-    # Search for containers
-    containers_query = """
-        SELECT DISTINCT container
-        FROM items
-        WHERE container LIKE :query
-        LIMIT :limit
-    """
+    async with database.transaction():
+        # The writer holds the write lock from BEGIN, so these bracket exactly this batch
+        generation_before = await database.fetch_val(query=GENERATION_QUERY)
+        
+        # Look up every id referenced by an update or delete in one query; holding
+        # the write lock, so the rows can't change before the writes below
+        referenced_ids = sorted({op.id for op in batch.operations if op.op != "create" and op.id is not None})
+        existing_ids = set()
+        if referenced_ids:
+            placeholders = ", ".join(f":id{n}" for n in range(len(referenced_ids)))
+            exists_query = f"""
+                SELECT id, area, container, bin,
+                    (SELECT json_group_array(tag) FROM items_tags WHERE item_id = items.id) AS tags
+                FROM items WHERE id IN ({placeholders})
+            """
+            rows = await database.fetch_all(
+                query=exists_query,
+                values={f"id{n}": item_id for n, item_id in enumerate(referenced_ids)}
+            )
+            existing_ids = {row["id"] for row in rows}
+            locations = {row["id"]: {key: row[key] for key in ("area", "container", "bin")} for row in rows}
+            # Every touched item's current location and tags, for response cache eviction
+            touched = [key for row in rows for key in item_cache_keys(locations[row["id"]], json.loads(row["tags"]))]
+        else:
+            locations = {}
+            touched = []
+        
+        for index, op in enumerate(batch.operations):
+            result = {"index": index, "op": op.op, "status_code": 200, "id": op.id}
+            
+            if op.op == "create":
+                try:
+                    item = ItemCreate(**(op.item or {}))
+                except ValidationError as exc:
+                    results.append({**result, "status_code": 422, "detail": str(exc)})
+                    continue
+                
+                values = item_insert_values(item)
+                item_id = await database.execute(query=INSERT_ITEM_QUERY, values=values)
+                existing_ids.add(item_id)
+                locations[item_id] = values
+                touched.extend(item_cache_keys(values))
+                name_changes.extend(item_name_changes(values))
+                if item.tags:
+                    pending_tags[item_id] = item.tags
+                results.append({**result, "id": item_id})
+                continue
+            
+            if op.id is None or op.id not in existing_ids:
+                results.append({**result, "status_code": 404, "detail": "Item not found"})
+                continue
+            
+            if op.op == "update":
+                try:
+                    item = ItemUpdate(**(op.item or {}))
+                except ValidationError as exc:
+                    results.append({**result, "status_code": 422, "detail": str(exc)})
+                    continue
+                
+                update_query, values = build_item_update(op.id, item)
+                if update_query:
+                    await database.execute(query=update_query, values=values)
+                    old_location = locations[op.id]
+                    new_location = {**old_location, **{key: values[key] for key in ("area", "container", "bin") if key in values}}
+                    name_changes.extend(item_name_changes(old_location, delta=-1))
+                    name_changes.extend(item_name_changes(new_location))
+                    touched.extend(item_cache_keys(new_location))
+                    locations[op.id] = new_location
+                if item.tags is not None:
+                    clear_tags_ids.append(op.id)
+                    pending_tags[op.id] = item.tags
+            else:
+                existing_ids.discard(op.id)
+                name_changes.extend(item_name_changes(locations.pop(op.id), delta=-1))
+                pending_tags.pop(op.id, None)
+                clear_tags_ids.append(op.id)
+                delete_ids.append(op.id)
+            
+            results.append(result)
+        
+        if clear_tags_ids:
+            old_tags_query = f"SELECT tag FROM items_tags WHERE item_id IN ({', '.join(str(item_id) for item_id in clear_tags_ids)})"
+            old_tags = await database.fetch_all(query=old_tags_query)
+            name_changes.extend(("tag", row["tag"], -1) for row in old_tags)
+            await database.execute_many(
+                query="DELETE FROM items_tags WHERE item_id = :item_id",
+                values=[{"item_id": item_id} for item_id in clear_tags_ids]
+            )
+        
+        if delete_ids:
+            await database.execute_many(
+                query="DELETE FROM items WHERE id = :item_id",
+                values=[{"item_id": item_id} for item_id in delete_ids]
+            )
+        
+        tag_values = [
+            {"item_id": item_id, "tag": tag}
+            for item_id, tags in pending_tags.items()
+            for tag in tags
+        ]
+        if tag_values:
+            await database.execute_many(query=INSERT_TAG_QUERY, values=tag_values)
+        
+        generation_after = await database.fetch_val(query=GENERATION_QUERY)
     
-    containers = await database.fetch_all(
-        query=containers_query, 
-        values={"query": f"%{q}%", "limit": limit}
-    )
+    write_generation.observe(generation_before, generation_after)
+    invalidate_item_caches(touched + item_cache_keys({}, [value["tag"] for value in tag_values]))
+    name_index.apply(name_changes, generation_after)
+    name_index.apply((("tag", value["tag"], 1) for value in tag_values), generation_after)
     
-    # Search for bins
-    bins_query = """
-        SELECT DISTINCT bin
-        FROM items
-        WHERE bin LIKE :query
+    failed = sum(1 for result in results if result["status_code"] != 200)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+@router.get("/search/autocomplete")
+async def search_autocomplete(
+    q: str,
+    limit: int = 10,
+    current_user: str = Depends(get_current_user)
+):
+    # Item names come from the trigram-indexed vocabulary; locations and tags
+    # are answered from the in-memory name index without touching SQLite
+    query = """
+        SELECT value FROM suggestions
+        WHERE kind = 'item' AND id IN (
+            SELECT rowid FROM suggestions_fts
+            WHERE value LIKE :query
+        )
+        ORDER BY uses DESC, value
         LIMIT :limit
     """
     
-    bins = await database.fetch_all(
-        query=bins_query, 
+    items = await read_database.fetch_all(
+        query=query, 
         values={"query": f"%{q}%", "limit": limit}
     )
     
-    # Search for tags
-    tags_query = """
-        SELECT DISTINCT tag
-        FROM items_tags
-        WHERE tag LIKE :query
-        LIMIT :limit
-    """
-    
-    tags = await database.fetch_all(
-        query=tags_query, 
-        values={"query": f"%{q}%", "limit": limit}
-    )
+    await name_index.ensure_loaded()
     
     return {
-        "items": [item["name"] for item in items],
-        "areas": [area["area"] for area in areas if area["area"]],
-        "containers": [container["container"] for container in containers if container["container"]],
-        "bins": [bin["bin"] for bin in bins if bin["bin"]],
-        "tags": [tag["tag"] for tag in tags]
+        "items": [item["value"] for item in items],
+        "areas": name_index.lookup("area", q, limit),
+        "containers": name_index.lookup("container", q, limit),
+        "bins": name_index.lookup("bin", q, limit),
+        "tags": name_index.lookup("tag", q, limit)
     }
+
+@router.get("/search/stats")
+async def search_index_stats(
+    current_user: str = Depends(get_current_user)
+):
+    await name_index.ensure_loaded()
+    return name_index.stats()
+
+@router.get("/cache/stats")
+async def cache_stats(
+    current_user: str = Depends(get_current_user)
+):
+    # Size and hit rate of the in-process caches
+    return {"responses": response_cache.stats(), "counts": count_cache.stats()}
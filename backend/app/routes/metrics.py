@@ -0,0 +1,20 @@
+import os
+import secrets
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from ..metrics import registry
+
+router = APIRouter()
+
+# When set, scrapers must send "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not secrets.compare_digest(supplied, METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    # Prometheus text exposition format, for this worker process only
+    return PlainTextResponse(await registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,33 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text
 from typing import List, Optional
 from ..schemas import TagDetail
-from ..database import database
+from ..database import read_database, next_id_cursor, ITEM_TAGS_JSON, decode_item_rows
+from ..database.name_index import name_index
 from ..auth.oauth import get_current_user
+from ..responses import TrustedJSONResponse, cached_response
+from .item_pages import ITEMS_LIMIT_MAX, items_page_start
 
 router = APIRouter()
 
 @router.get("/tags", response_model=List[str])
+@cached_response(lambda **_: [("names", "tag")])
 async def get_tags(
     current_user: str = Depends(get_current_user)
 ):
-    query = """
-        SELECT DISTINCT tag
-        FROM items_tags
-        ORDER BY tag
-    """
-    
-    results = await database.fetch_all(query=query)
-    return [result["tag"] for result in results]
+    # Served from the in-memory name index
+    await name_index.ensure_loaded()
+    return name_index.names("tag")
 
 @router.get("/tags/{tag}", response_model=TagDetail)
+@cached_response(lambda tag, **_: [("tag", tag)])
 async def get_tag_detail(
     tag: str,
+    include_items: bool = True,
+    items_limit: Optional[int] = Query(None, ge=1, le=ITEMS_LIMIT_MAX),
+    cursor: Optional[str] = None,
     current_user: str = Depends(get_current_user)
 ):
+    after_id = items_page_start(cursor)
+    
     # Check if tag exists
     exists_query = "SELECT COUNT(*) FROM items_tags WHERE tag = :tag"
-    count = await database.fetch_val(query=exists_query, values={"tag": tag})
+    count = await read_database.fetch_val(query=exists_query, values={"tag": tag})
     
     if count == 0:
         raise HTTPException(status_code=404, detail="Tag not found")
@@ -42,7 +47,7 @@ async def get_tag_detail(
         WHERE it.tag = :tag
     """
     
-    summary = await database.fetch_one(query=summary_query, values={"tag": tag})
+    summary = await read_database.fetch_one(query=summary_query, values={"tag": tag})
     
     # Get areas
     areas_query = """
@@ -53,7 +58,7 @@ async def get_tag_detail(
         LIMIT 9
     """
     
-    areas_result = await database.fetch_all(query=areas_query, values={"tag": tag})
+    areas_result = await read_database.fetch_all(query=areas_query, values={"tag": tag})
     areas = [area["area"] for area in areas_result if area["area"]]
     
     # Get containers
@@ -65,7 +70,7 @@ async def get_tag_detail(
         LIMIT 9
     """
     
-    containers_result = await database.fetch_all(query=containers_query, values={"tag": tag})
+    containers_result = await read_database.fetch_all(query=containers_query, values={"tag": tag})
     containers = [container["container"] for container in containers_result if container["container"]]
     
     # Get bins
@@ -77,43 +82,34 @@ async def get_tag_detail(
         LIMIT 9
     """
     
-    bins_result = await database.fetch_all(query=bins_query, values={"tag": tag})
+    bins_result = await read_database.fetch_all(query=bins_query, values={"tag": tag})
     bins = [bin["bin"] for bin in bins_result if bin["bin"]]
     
-    # Get items
-    items_query = """
-        SELECT i.*, GROUP_CONCAT(it2.tag) as tags
-        FROM items i
-        JOIN items_tags it ON i.id = it.item_id
-        LEFT JOIN items_tags it2 ON i.id = it2.item_id
-        WHERE it.tag = :tag
-        GROUP BY i.id
-    """
-    
-    items_result = await database.fetch_all(query=items_query, values={"tag": tag})
-    
-    # Process the items to include tags
+    # Get one page of items, in id order; a negative limit means no limit
     items = []
-    for row in items_result:
-        # Convert row to dict using dict() instead of items()
-        item_dict = dict(row)
-        # Remove tags from the dict as we'll process it separately
-        tags_str = item_dict.pop('tags', None)
-        
-        tags = []
-        if tags_str:
-            tag_list = tags_str.split(',')
-            tags = [{"id": -1, "item_id": item_dict['id'], "tag": t} for t in tag_list]
+    if include_items:
+        items_query = f"""
+            SELECT i.*, {ITEM_TAGS_JSON} as tags
+            FROM items i
+            WHERE i.id IN (SELECT item_id FROM items_tags WHERE tag = :tag)
+            AND i.id > :after_id
+            ORDER BY i.id
+            LIMIT :items_limit
+        """
         
-        item_dict['tags'] = tags
-        items.append(item_dict)
+        items_result = await read_database.fetch_all(
+            query=items_query,
+            values={"tag": tag, "after_id": after_id, "items_limit": -1 if items_limit is None else items_limit}
+        )
+        items = decode_item_rows(items_result)
     
-    return {
+    return TrustedJSONResponse({
         "name": tag,
         "item_count": summary["item_count"] or 0,
         "total_quantity": summary["total_quantity"] or 0,
         "areas": areas,
         "containers": containers,
         "bins": bins,
-        "items": items
-    }
+        "items": items,
+        "next_cursor": next_id_cursor(items, items_limit)
+    })
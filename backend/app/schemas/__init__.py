@@ -1,5 +1,7 @@
 from .schemas import (
     Item, ItemCreate, ItemUpdate,
+    BatchOperation, BatchRequest, BatchOperationResult, BatchResult,
+    ImportRowError, ImportResult,
     Tag, TagCreate,
     SearchResult,
     AreaDetail, ContainerDetail, BinDetail, TagDetail,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 class TagBase(BaseModel):
     tag: str
@@ -30,6 +30,7 @@ class ItemCreate(ItemBase):
 class Item(ItemBase):
     id: int
     tags: List[Tag] = []
+    snippet: Optional[str] = None
     
     class Config:
         orm_mode = True
@@ -45,29 +46,68 @@ class ItemUpdate(BaseModel):
     url: Optional[str] = None
     tags: Optional[List[str]] = None
 
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    item: Optional[Dict[str, Any]] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    status_code: int
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    results: List[BatchOperationResult]
+    succeeded: int
+    failed: int
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: str
+
+class ImportResult(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[ImportRowError] = []
+    seconds: float
+    rows_per_second: float
+
 class SearchResult(BaseModel):
     items: List[Item]
-    total: int
+    total: Optional[int] = None
+    # True when total came from total=estimate and is a lower bound or an approximation
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
 
 class ContainerInfo(BaseModel):
     name: str
     item_count: int
     total_quantity: int
+    total_value: float = 0.0
     
 class AreaDetail(BaseModel):
     name: str
     item_count: int
     total_quantity: int
+    total_value: float = 0.0
     containers: List[ContainerInfo] = []
     items: List[Item] = []
+    next_cursor: Optional[str] = None
 
 class ContainerDetail(BaseModel):
     name: str
     area: str
     item_count: int
     total_quantity: int
+    total_value: float = 0.0
     bins: List[str] = []
     items: List[Item] = []
+    next_cursor: Optional[str] = None
 
 class BinDetail(BaseModel):
     name: str
@@ -75,7 +115,9 @@ class BinDetail(BaseModel):
     container: str
     item_count: int
     total_quantity: int
+    total_value: float = 0.0
     items: List[Item] = []
+    next_cursor: Optional[str] = None
 
 class TagDetail(BaseModel):
     name: str
@@ -85,6 +127,7 @@ class TagDetail(BaseModel):
     containers: List[str] = []
     bins: List[str] = []
     items: List[Item] = []
+    next_cursor: Optional[str] = None
 
 class UserBase(BaseModel):
     username: str
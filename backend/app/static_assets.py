@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional; existing .br files are still served without it
+    brotli = None
+
+# Vite writes bundles as name-<hash>.ext; their URL changes with their content
+FINGERPRINTED = re.compile(r"(^|/)assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/manifest+json")
+
+# Smaller files aren't worth compressing; larger files and variants stay on disk instead of in memory
+MIN_COMPRESS_BYTES = 1024
+MAX_MEMORY_BYTES = 2 * 1024 * 1024
+
+# Preferred first
+ENCODINGS = ("br", "gzip")
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+@dataclass
+class Variant:
+    path: str
+    stat: os.stat_result
+    body: Optional[bytes] = None
+
+@dataclass
+class Asset:
+    path: str
+    media_type: str
+    etag: str
+    cache_control: str
+    stat: os.stat_result
+    # Identity body when small enough to keep in memory, else None and served from path
+    body: Optional[bytes] = None
+    variants: Dict[str, Variant] = field(default_factory=dict)
+
+def accepted_encodings(header: str) -> set:
+    # Content codings from an Accept-Encoding header, minus any refused with q=0
+    encodings = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(coding.strip().lower())
+    return encodings
+
+def compress(body: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(body, quality=11)
+    return None
+
+def is_compressible(path: str, size: int) -> bool:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return size >= MIN_COMPRESS_BYTES and media_type.startswith(COMPRESSIBLE_TYPES)
+
+def read_if_small(path: str, stat: os.stat_result) -> Optional[bytes]:
+    if stat.st_size > MAX_MEMORY_BYTES:
+        return None
+    with open(path, "rb") as stream:
+        return stream.read()
+
+def precompress(root: str) -> int:
+    """Writes a .br and .gz file next to each compressible file under root.
+
+    Run once over the built frontend (the Docker build does), so workers only
+    read the variants at startup instead of each compressing every file.
+    A variant that wouldn't be smaller than its file isn't written.
+    """
+    written = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if filename.endswith(tuple(SUFFIXES.values())) or not is_compressible(path, os.path.getsize(path)):
+                continue
+            with open(path, "rb") as stream:
+                content = stream.read()
+            for encoding, suffix in SUFFIXES.items():
+                if os.path.exists(path + suffix):
+                    continue
+                variant = compress(content, encoding)
+                if variant is None or len(variant) >= len(content):
+                    continue
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".binventory-asset-")
+                with os.fdopen(fd, "wb") as stream:
+                    stream.write(variant)
+                os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+                os.replace(temp_path, path + suffix)
+                written += 1
+    return written
+
+def load_asset(root: str, relative_path: str) -> Asset:
+    path = os.path.join(root, relative_path)
+    stat = os.stat(path)
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    with open(path, "rb") as stream:
+        content = stream.read()
+
+    asset = Asset(
+        path=path,
+        media_type=media_type,
+        etag=hashlib.sha256(content).hexdigest()[:20],
+        cache_control=IMMUTABLE_CACHE_CONTROL if FINGERPRINTED.search(relative_path) else REVALIDATE_CACHE_CONTROL,
+        stat=stat,
+        body=content if stat.st_size <= MAX_MEMORY_BYTES else None,
+    )
+
+    if is_compressible(path, stat.st_size):
+        for encoding, suffix in SUFFIXES.items():
+            # Variants come from precompress or the frontend build; nothing is compressed here
+            if not os.path.exists(path + suffix):
+                continue
+            variant_stat = os.stat(path + suffix)
+            if variant_stat.st_size < stat.st_size:
+                asset.variants[encoding] = Variant(path + suffix, variant_stat, read_if_small(path + suffix, variant_stat))
+
+    return asset
+
+class AssetIndex:
+    """Every file of the built frontend, indexed once at startup.
+
+    Requests are answered from the index with no filesystem calls, except for
+    files too large to keep in memory: compressed variants, ETags and cache
+    headers are all worked out up front.
+    """
+
+    def __init__(self, root: str, fallback: str = "index.html"):
+        self.root = root
+        self.fallback = fallback
+        self.assets: Dict[str, Asset] = {}
+
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith((".gz", ".br")):
+                    continue
+                relative_path = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, "/")
+                self.assets[relative_path] = load_asset(root, relative_path)
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        # Unknown paths are frontend routes and get the SPA entry point, except
+        # under assets/, where a missing bundle should be a real 404
+        asset = self.assets.get(path.lstrip("/"))
+        if asset is None and not path.lstrip("/").startswith("assets/"):
+            asset = self.assets.get(self.fallback)
+        return asset
+
+    def respond(self, asset: Asset, request: Request) -> Response:
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = next((encoding for encoding in ENCODINGS if encoding in asset.variants and encoding in accepted), None)
+
+        # Each representation needs its own strong ETag
+        etag = f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+        headers = {"etag": etag, "cache-control": asset.cache_control}
+        if asset.variants:
+            headers["vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [candidate.strip() for candidate in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            variant = asset.variants[encoding]
+            headers["content-encoding"] = encoding
+            if variant.body is not None:
+                return Response(variant.body, media_type=asset.media_type, headers=headers)
+            return FileResponse(variant.path, media_type=asset.media_type, headers=headers, stat_result=variant.stat)
+        if asset.body is not None:
+            return Response(asset.body, media_type=asset.media_type, headers=headers)
+        return FileResponse(asset.path, media_type=asset.media_type, headers=headers, stat_result=asset.stat)
@@ -0,0 +1,68 @@
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas import SearchResult
+from app.responses import TrustedJSONResponse, orjson
+
+def build_payload(items: int, tags: int) -> dict:
+    # Same shape as a get_items page decoded by app.database.item_rows
+    return {
+        "items": [
+            {
+                "id": item_id,
+                "name": f"M3 bolt {item_id}",
+                "description": "Stainless steel, 12mm",
+                "area": "Garage",
+                "container": "Shelf",
+                "bin": f"A{item_id % 40}",
+                "quantity": item_id % 50,
+                "cost": 0.25,
+                "url": None,
+                "tags": [
+                    {"id": item_id * tags + n, "item_id": item_id, "tag": f"tag{n}"}
+                    for n in range(tags)
+                ],
+                "snippet": None,
+            }
+            for item_id in range(1, items + 1)
+        ],
+        "total": items,
+        "total_is_estimate": False,
+        "next_cursor": None,
+    }
+
+def validated_response(payload: dict) -> bytes:
+    # What FastAPI does with a plain dict and response_model=SearchResult
+    model = SearchResult(**payload)
+    return JSONResponse(jsonable_encoder(model)).body
+
+def trusted_response(payload: dict) -> bytes:
+    return TrustedJSONResponse(payload).body
+
+def cpu_per_request(render, payload: dict, repeat: int) -> float:
+    render(payload)
+    started = time.process_time()
+    for _ in range(repeat):
+        render(payload)
+    return (time.process_time() - started) / repeat
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare CPU per request of the validated and trusted response paths")
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 5000], help="Items per response")
+    parser.add_argument("--tags", type=int, default=3, help="Tags per item")
+    parser.add_argument("--repeat", type=int, default=20, help="Requests timed per size")
+    args = parser.parse_args()
+
+    print(f"Encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"{'items':>8} {'validated ms':>14} {'trusted ms':>12} {'speedup':>9}")
+    for items in args.items:
+        payload = build_payload(items, args.tags)
+        # Both paths must produce the same document for the comparison to mean anything
+        assert json.loads(validated_response(payload)) == json.loads(trusted_response(payload))
+        validated = cpu_per_request(validated_response, payload, args.repeat)
+        trusted = cpu_per_request(trusted_response, payload, args.repeat)
+        print(f"{items:>8} {validated * 1000:>14.2f} {trusted * 1000:>12.2f} {validated / trusted:>8.1f}x")
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+
+if __name__ == "__main__":
+    # The app opens ./binventory.db by default, so run against a scratch database
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp())
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.auth.oauth import get_current_user
+    from app.database.cache import drop_local_caches
+    from app.query_budget import QUERY_BUDGETS, query_count
+
+    app.dependency_overrides[get_current_user] = lambda: "query-budget"
+
+    # Runs every budgeted endpoint with cold caches and exits non-zero if one goes over
+    over = 0
+    with TestClient(app) as client:
+        for n in range(20):
+            client.post("/api/items", json={
+                "name": f"M3 bolt {n}", "area": "Garage", "container": "Shelf", "bin": "A1",
+                "quantity": n, "tags": ["metric", f"size{n % 4}"],
+            })
+
+        for (method, url), budget in QUERY_BUDGETS.items():
+            drop_local_caches()
+            body = {"name": "Washer", "area": "Garage", "tags": ["metric"]} if method in ("POST", "PUT") else None
+            response = client.request(method, url, json=body)
+            count = query_count(response)
+            over += count > budget
+            print(f"{method:6} {url:40} {response.status_code}  {count}/{budget}{'  <-- OVER BUDGET' if count > budget else ''}")
+
+    sys.exit(1 if over else 0)
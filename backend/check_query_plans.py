@@ -0,0 +1,23 @@
+import asyncio
+import sys
+
+from app.database.init_db import create_db_and_tables, engine
+from app.database.migrations import get_schema_version
+from app.database.query_plans import REPRESENTATIVE_QUERIES, explain_query_plan, full_scans
+
+if __name__ == "__main__":
+    # Prints the plan of each representative query and exits non-zero on full table scans.
+    # The schema is brought up to date first, so a fresh checkout has tables to plan against.
+    asyncio.run(create_db_and_tables())
+    scans = 0
+    with engine.connect() as conn:
+        print(f"Schema version: {get_schema_version(conn)}")
+        for name, (query, values) in REPRESENTATIVE_QUERIES.items():
+            plan = explain_query_plan(conn, query, values)
+            flagged = full_scans(plan)
+            scans += len(flagged)
+            print(f"\n{name}{'  <-- FULL SCAN' if flagged else ''}")
+            for line in plan:
+                print(f"  {line}")
+    
+    sys.exit(1 if scans else 0)
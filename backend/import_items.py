@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from app.database.init_db import database, create_db_and_tables
+from app.database.bulk_import import ImportFileError, import_items, detect_format, IMPORT_CHUNK_ROWS
+
+async def run(path: str, format: str, chunk_size: int):
+    await create_db_and_tables()
+    await database.connect()
+    try:
+        with open(path, "rb") as stream:
+            return await import_items(stream, format, chunk_size)
+    finally:
+        await database.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import items from a CSV or NDJSON file")
+    parser.add_argument("path", help="File to import")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_ROWS, help="Rows per transaction")
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(run(args.path, args.format or detect_format(args.path), args.chunk_size))
+    except ImportFileError as exc:
+        sys.exit(f"Import stopped: {exc}")
+    print(json.dumps(result, indent=2))
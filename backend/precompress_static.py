@@ -0,0 +1,8 @@
+import sys
+
+from app.static_assets import precompress
+
+if __name__ == "__main__":
+    # Writes .br and .gz files next to the built frontend, so workers don't compress at startup
+    root = sys.argv[1] if len(sys.argv) > 1 else "../static"
+    print(f"Wrote {precompress(root)} compressed files under {root}")